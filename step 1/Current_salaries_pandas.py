@@ -1,38 +1,63 @@
 import numpy as np
 import pandas as pd
+from currency_rates import CurrencyRates
+import profiler
 
 pd.set_option("display.max_columns", False)
 pd.set_option("expand_frame_repr", False)
 
 
-def calculate(data, rub_exchange_rate):
-    s_from = float(data[0])
-    s_to = float(data[1])
-    cur = str(data[2])
-    date = str(data[3])
-    date = date[:7]
-    if cur == "0" or (cur != "RUR" and cur not in rub_exchange_rate.columns) or (s_from == 0 and s_to == 0):
-        return np.NAN
+def calculate(df_, rub_exchange_rate):
+    """
+    Переводит оклады в рубли по курсу на месяц публикации вакансии
+
+    Курс берётся из матрицы месяц x валюта сразу для всех строк, среднее значение вилки считается по столбцам.
+    :param df_: DataFrame
+        вакансии со столбцами salary_from, salary_to, salary_currency, published_at (без пропусков)
+    :param rub_exchange_rate: CurrencyRates
+        курсы валют по месяцам
+    :return: ndarray
+        оклад в рублях, NaN - если оклад не указан или курс валюты неизвестен
+
+    >>> rates = CurrencyRates.from_frame(pd.DataFrame({"Date": ["2003-09", "2003-10"], "USD": [30.0, 31.0]}))
+    >>> df = pd.DataFrame({"salary_from": [100.0, 0, 1000, 0, 5],
+    ...                    "salary_to": [200.0, 300, 0, 0, 5],
+    ...                    "salary_currency": ["USD", "USD", "RUR", "RUR", "EUR"],
+    ...                    "published_at": ["2003-09-19T14:42:13+0400", "2003-10-07T00:00:00+0400",
+    ...                                     "2003-10-07T00:00:00+0400", "2003-10-07T00:00:00+0400",
+    ...                                     "2003-10-07T00:00:00+0400"]})
+    >>> calculate(df, rates).tolist()
+    [4500.0, 9300.0, 1000.0, nan, nan]
+    """
+    s_from = df_["salary_from"].to_numpy(dtype=float)
+    s_to = df_["salary_to"].to_numpy(dtype=float)
+    cur = df_["salary_currency"].astype(str).to_numpy()
+    months = df_["published_at"].astype(str).to_numpy()
+
     salary = s_from + s_to
-    if s_from != 0 and s_to != 0:
-        salary = salary / 2
-    ratio = 1
-    if cur != "RUR":
-        ratio = rub_exchange_rate[rub_exchange_rate["Date"] == date][cur].values[0]
-    return round(salary * ratio)
+    both = (s_from != 0) & (s_to != 0)
+    salary[both] /= 2
+    salary[(s_from == 0) & (s_to == 0)] = np.nan
+
+    return np.round(salary * rub_exchange_rate.get_rates(cur, months))
 
 
 def join_salaries_field(df_):
-    rub_exchange_rate = pd.read_csv("module_3.3_API/currencies.csv")
-    df_ = df_.fillna(0)
-    df_["salary"] = df_[["salary_from", "salary_to", "salary_currency", "published_at"]].apply(calculate,
-                                                                                               rub_exchange_rate=rub_exchange_rate,
-                                                                                               axis=1).astype(float)
+    rub_exchange_rate = CurrencyRates.from_csv("module_3.3_API/currencies.csv")
+    with profiler.stage("clean", len(df_)):
+        df_ = df_.fillna(0)
+    with profiler.stage("convert", len(df_)):
+        df_["salary"] = calculate(df_, rub_exchange_rate)
     df_ = df_[["name", "salary", "area_name", "published_at"]]
     return df_
 
 
-file_path = "..\\Data\\vacancies_dif_currencies.csv"
-df = pd.read_csv(file_path)
-df = df.pipe(join_salaries_field)
-df.to_csv("join_salaries_field_vacancies_full.csv", index=False)
+if __name__ == "__main__":
+    file_path = "..\\Data\\vacancies_dif_currencies.csv"
+    with profiler.stage("join_salaries_field"):
+        with profiler.stage("read") as current:
+            df = pd.read_csv(file_path)
+            current.rows = len(df)
+        df = df.pipe(join_salaries_field)
+        with profiler.stage("write", len(df)):
+            df.to_csv("join_salaries_field_vacancies_full.csv", index=False)
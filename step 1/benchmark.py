@@ -0,0 +1,397 @@
+import argparse
+import csv
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Столбцы файлов: hh - как hhVacancies.csv, join - как join_salaries_field_vacancies.csv,
+# table - полная выгрузка для table.py
+SCHEMAS = {
+    "hh": ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"],
+    "join": ["name", "salary", "area_name", "published_at"],
+    "table": ["name", "description", "key_skills", "experience_id", "premium", "employer_name", "salary_from",
+              "salary_to", "salary_gross", "salary_currency", "area_name", "published_at"],
+}
+# Выгрузки hh.ru сохранены с BOM, результат join_salaries_field - без него
+ENCODINGS = {"hh": "utf_8_sig", "join": "utf_8", "table": "utf_8_sig"}
+
+PROFESSION = "Программист"
+AREA = "Москва"
+FIRST_YEAR, LAST_YEAR = 2003, 2022
+
+NAMES = ["Программист", "Программист 1С", "Ведущий программист Python", "Аналитик", "Бизнес-аналитик",
+         "Менеджер по продажам", "Бухгалтер", "Инженер-конструктор", "Тестировщик", "Дизайнер интерфейсов",
+         "Системный администратор", "Водитель", "DevOps инженер", "Frontend-разработчик", "Оператор call-центра"]
+AREAS = ["Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Нижний Новгород", "Пермь",
+         "Краснодар", "Самара", "Воронеж", "Омск", "Уфа", "Тула", "Хабаровск", "Алматы", "Минск"]
+AREA_WEIGHTS = [30, 12, 6, 6, 5, 4, 4, 4, 3, 3, 3, 3, 2, 2, 2, 1]
+CURRENCIES = ["RUR", "USD", "EUR", "KZT", "UAH", "BYR"]
+CURRENCY_WEIGHTS = [90, 4, 2, 2, 1, 1]
+SKILLS = ["Python", "SQL", "Git", "Linux", "1С", "Excel", "Английский язык", "Docker", "Django", "Деловая переписка"]
+EXPERIENCE = ["noExperience", "between1And3", "between3And6", "moreThan6"]
+
+
+def write_vacancies(file, rows, schema="hh", seed=0):
+    """
+    Записывает синтетические вакансии в формате csv
+
+    Одинаковые rows, schema и seed всегда дают одинаковый файл. Около четверти вакансий без оклада
+    или с одной границей вилки, как в выгрузках hh.ru.
+    :param file: TextIO
+        открытый файл
+    :param rows: int
+        количество вакансий
+    :param schema: str
+        набор столбцов (см. SCHEMAS)
+    :param seed: int
+        зерно генератора
+
+    >>> first, second = io.StringIO(), io.StringIO()
+    >>> write_vacancies(first, 100, "join", seed=1)
+    >>> write_vacancies(second, 100, "join", seed=1)
+    >>> first.getvalue() == second.getvalue()
+    True
+    >>> first.getvalue().splitlines()[0], len(list(csv.reader(io.StringIO(first.getvalue()))))
+    ('name,salary,area_name,published_at', 101)
+    """
+    rnd = random.Random(seed)
+    columns = SCHEMAS[schema]
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    years = list(range(FIRST_YEAR, LAST_YEAR + 1))
+    year_weights = [i + 1 for i in range(len(years))]
+    for year, area, currency in zip(rnd.choices(years, year_weights, k=rows), rnd.choices(AREAS, AREA_WEIGHTS, k=rows),
+                                    rnd.choices(CURRENCIES, CURRENCY_WEIGHTS, k=rows)):
+        salary_from = rnd.randrange(10, 300) * 1000
+        salary_to = salary_from + rnd.randrange(0, 100) * 1000
+        empty = rnd.random()
+        if empty < 0.1:
+            salary_from = salary_to = currency = ""
+        elif empty < 0.2:
+            salary_from = ""
+        elif empty < 0.25:
+            salary_to = ""
+        values = {
+            "name": rnd.choice(NAMES),
+            "salary_from": salary_from,
+            "salary_to": salary_to,
+            "salary_currency": currency,
+            "area_name": area,
+            "published_at": f"{year}-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}T"
+                            f"{rnd.randint(0, 23):02}:{rnd.randint(0, 59):02}:{rnd.randint(0, 59):02}+0300",
+        }
+        if schema == "join":
+            values["salary"] = "" if salary_from == "" or salary_to == "" else float((salary_from + salary_to) // 2)
+        elif schema == "table":
+            values["description"] = "<p><strong>Обязанности:</strong></p> <ul> <li>" \
+                                    + "</li> <li>".join(rnd.sample(SKILLS, 3)) + "</li> </ul>"
+            values["key_skills"] = "\n".join(rnd.sample(SKILLS, rnd.randint(1, 4)))
+            values["experience_id"] = rnd.choice(EXPERIENCE)
+            values["premium"] = rnd.choice(["True", "False"])
+            values["employer_name"] = f"Компания {rnd.randrange(1000)}"
+            values["salary_gross"] = rnd.choice(["True", "False"])
+        writer.writerow([values[column] for column in columns])
+
+
+def write_currencies(file_name, seed=0):
+    """
+    Записывает синтетические курсы валют в формате module_3.3_API/currencies.csv
+    :param file_name: str
+        имя/полный путь файла
+    :param seed: int
+        зерно генератора
+    """
+    rnd = random.Random(seed)
+    currencies = [currency for currency in CURRENCIES if currency != "RUR"]
+    base = {"USD": 30.0, "EUR": 35.0, "KZT": 0.2, "UAH": 5.0, "BYR": 0.015}
+    with open(file_name, "w", encoding="utf_8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date"] + currencies)
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            for month in range(1, 13):
+                writer.writerow([f"{year}-{month:02}"] + [round(base[c] * rnd.uniform(0.8, 1.2), 7)
+                                                          for c in currencies])
+
+
+def generate(data_dir, rows, schema, seed=0):
+    """
+    Возвращает путь к файлу вакансий, при необходимости создаёт его
+    :param data_dir: str
+        папка с файлами
+    :param rows: int
+        количество вакансий
+    :param schema: str
+        набор столбцов
+    :param seed: int
+        зерно генератора
+    :return: str
+        путь к файлу
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{schema}_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        with open(path + ".tmp", "w", encoding=ENCODINGS[schema], newline="") as file:
+            write_vacancies(file, rows, schema, seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def _load_task_2():
+    """
+    :return: module
+        module_3.2/task 2.py (имя файла не позволяет обычный импорт)
+    """
+    spec = importlib.util.spec_from_file_location("task_2", os.path.join(DIRECTORY, "module_3.2", "task 2.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["task_2"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _statistic(file_name, mode):
+    import statistic
+
+    def run():
+        data = statistic.DataSet(file_name, streaming=mode != "store")
+        if mode == "parallel":
+            data.collect_statistic_parallel(PROFESSION)
+        else:
+            data.collect_statistic(PROFESSION)
+    return run
+
+
+def _table(file_name):
+    import table
+
+    return lambda: table.DataSet(file_name)
+
+
+def _solution(file_name, runner):
+    solution = _load_task_2().Solution(file_name, PROFESSION)
+    solution.divide_file_by_year()
+    return getattr(solution, runner)
+
+
+def _get_dataframes(file_name):
+    import statistic_city_with_pandas
+
+    return lambda: statistic_city_with_pandas.get_dataframes(file_name, PROFESSION, AREA)
+
+
+def _join_salaries_field(file_name):
+    import pandas as pd
+    from Current_salaries_pandas import join_salaries_field
+
+    os.makedirs("module_3.3_API", exist_ok=True)
+    write_currencies(os.path.join("module_3.3_API", "currencies.csv"))
+    return lambda: pd.read_csv(file_name).pipe(join_salaries_field)
+
+
+# Название - (набор столбцов файла, функция подготовки). Подготовка выполняется в рабочей папке замера,
+# не входит в замер и возвращает замеряемую функцию
+CASES = {
+    "statistic": ("hh", lambda file_name: _statistic(file_name, "store")),
+    "statistic_streaming": ("hh", lambda file_name: _statistic(file_name, "streaming")),
+    "statistic_parallel": ("hh", lambda file_name: _statistic(file_name, "parallel")),
+    "table": ("table", _table),
+    "solution_mltproc_off": ("hh", lambda file_name: _solution(file_name, "create_statistic_by_year_mltproc_off")),
+    "solution_mltproc_on": ("hh", lambda file_name: _solution(file_name, "create_statistic_by_year_mltproc_on")),
+    "solution_concurrent_futures": ("hh", lambda file_name: _solution(file_name,
+                                                                     "create_statistic_by_year_concurrent_futures")),
+    "get_dataframes": ("join", _get_dataframes),
+    "join_salaries_field": ("hh", _join_salaries_field),
+}
+
+
+def _peak_rss_kb():
+    """
+    :return: int | None
+        наибольший объём резидентной памяти (КБ) среди текущего процесса и его завершённых дочерних процессов,
+        None - если платформа не позволяет его узнать
+    """
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(case, file_name):
+    """
+    Выполняет один замер в текущем процессе (вызывается из measure в отдельном процессе)
+    :param case: str
+        название замера
+    :param file_name: str
+        файл с вакансиями
+    :return: dict
+        время (с) и пиковая память (КБ)
+    """
+    sys.path.insert(0, DIRECTORY)
+    import executor
+
+    func = CASES[case][1](os.path.abspath(file_name))
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    executor.shutdown()
+    return {"seconds": seconds, "peak_rss_kb": _peak_rss_kb()}
+
+
+def measure(case, file_name, rows):
+    """
+    Замер в отдельном процессе, в пустой рабочей папке и с пустым csv_cache, чтобы замеры не влияли друг на друга
+    :param case: str
+        название замера
+    :param file_name: str
+        файл с вакансиями
+    :param rows: int
+        количество вакансий в файле
+    :return: dict
+        результат замера
+    """
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        env = dict(os.environ, VACANCY_CACHE_DIR=os.path.join(workdir, ".vacancy_cache"))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "case", case, os.path.abspath(file_name)],
+                                cwd=workdir, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    result = json.loads(output.splitlines()[-1])
+    return {"case": case, "rows": rows, "seconds": round(result["seconds"], 4),
+            "rows_per_sec": round(rows / result["seconds"]) if result["seconds"] else None,
+            "peak_rss_kb": result["peak_rss_kb"]}
+
+
+def _version():
+    """
+    :return: dict
+        коммит и окружение, на которых выполнены замеры
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORY, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count()}
+
+
+def run(cases, sizes, data_dir, repeat=1, seed=0):
+    """
+    Выполняет замеры для всех сочетаний замера и размера файла
+    :param cases: str[]
+        названия замеров
+    :param sizes: int[]
+        количества вакансий
+    :param data_dir: str
+        папка со сгенерированными файлами
+    :param repeat: int
+        количество повторов (в отчёт идёт лучшее время и наибольшая память)
+    :param seed: int
+        зерно генератора
+    :return: dict
+        отчёт: версия и список результатов
+    """
+    results = []
+    for rows in sizes:
+        for case in cases:
+            file_name = generate(data_dir, rows, CASES[case][0], seed)
+            attempts = [measure(case, file_name, rows) for _ in range(repeat)]
+            best = min(attempts, key=lambda result: result["seconds"])
+            rss = [result["peak_rss_kb"] for result in attempts if result["peak_rss_kb"] is not None]
+            best["peak_rss_kb"] = max(rss) if rss else None
+            results.append(best)
+            print(f"{case:<30}{rows:>10} строк {best['seconds']:>10.3f} с {best['rows_per_sec'] or 0:>12} строк/с "
+                  f"{best['peak_rss_kb'] or '-':>10} КБ", file=sys.stderr)
+    return {"version": _version(), "seed": seed, "results": results}
+
+
+def compare(old, new):
+    """
+    Сравнивает два отчёта run
+    :param old: dict
+        отчёт предыдущей версии
+    :param new: dict
+        отчёт новой версии
+    :return: str[]
+        строки сравнения: замер, размер, ускорение и отношение памяти (новая / старая)
+
+    >>> old = {"results": [{"case": "table", "rows": 10, "seconds": 2.0, "peak_rss_kb": 100}]}
+    >>> new = {"results": [{"case": "table", "rows": 10, "seconds": 0.5, "peak_rss_kb": 50}]}
+    >>> compare(old, new)
+    ['table                                 10    x4.00 быстрее   память x0.50']
+    """
+    previous = dict(((result["case"], result["rows"]), result) for result in old["results"])
+    lines = []
+    for result in new["results"]:
+        before = previous.get((result["case"], result["rows"]))
+        if before is None or not result["seconds"]:
+            continue
+        memory = f"память x{result['peak_rss_kb'] / before['peak_rss_kb']:.2f}" \
+            if result["peak_rss_kb"] and before["peak_rss_kb"] else "память -"
+        lines.append(f"{result['case']:<30}{result['rows']:>10}    x{before['seconds'] / result['seconds']:.2f} быстрее"
+                     f"   {memory}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости и памяти обработки вакансий")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="создать файл синтетических вакансий")
+    generate_parser.add_argument("file")
+    generate_parser.add_argument("--rows", type=int, default=10000)
+    generate_parser.add_argument("--schema", choices=sorted(SCHEMAS), default="hh")
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = commands.add_parser("run", help="выполнить замеры и вывести отчёт в json")
+    run_parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    run_parser.add_argument("--rows", nargs="+", type=int, default=[10000])
+    run_parser.add_argument("--data-dir", default=os.path.join(DIRECTORY, ".benchmark_data"))
+    run_parser.add_argument("--repeat", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", help="файл отчёта (по умолчанию - стандартный вывод)")
+
+    compare_parser = commands.add_parser("compare", help="сравнить два отчёта")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    case_parser = commands.add_parser("case")
+    case_parser.add_argument("case", choices=list(CASES))
+    case_parser.add_argument("file")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        with open(args.file, "w", encoding=ENCODINGS[args.schema], newline="") as file:
+            write_vacancies(file, args.rows, args.schema, args.seed)
+    elif args.command == "run":
+        report = json.dumps(run(args.cases, args.rows, args.data_dir, args.repeat, args.seed), ensure_ascii=False,
+                            indent=1)
+        if args.output:
+            with open(args.output, "w", encoding="utf_8") as file:
+                file.write(report)
+        else:
+            print(report)
+    elif args.command == "compare":
+        with open(args.old, encoding="utf_8") as old, open(args.new, encoding="utf_8") as new:
+            print("\n".join(compare(json.load(old), json.load(new))))
+    else:
+        print(json.dumps(run_case(args.case, args.file)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+CACHE_DIR_ENV = "VACANCY_CACHE_DIR"
+
+
+def _cache_dir(file_name, tag):
+    """
+    Папка кэша для файла и способа его обработки
+    :param file_name: str
+        имя/полный путь исходного csv файла
+    :param tag: str
+        способ обработки (у разных читателей разные колонки)
+    :return: str
+        путь к папке кэша (по умолчанию - .vacancy_cache рядом с исходным файлом)
+    """
+    path = os.path.abspath(file_name)
+    root = os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.dirname(path), ".vacancy_cache")
+    key = hashlib.sha1(path.encode("utf_8")).hexdigest()[:12]
+    return os.path.join(root, f"{os.path.basename(path)}.{tag}.{key}")
+
+
+def _source_stamp(file_name):
+    """
+    :param file_name: str
+        имя/полный путь исходного csv файла
+    :return: dict
+        размер и время изменения файла, по которым проверяется актуальность кэша
+    """
+    stat = os.stat(file_name)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def exists(file_name, tag):
+    """
+    Проверяет, есть ли актуальный кэш файла, не открывая колонок
+    :param file_name: str
+        имя/полный путь исходного csv файла
+    :param tag: str
+        способ обработки
+    :return: bool
+    """
+    meta = _load_meta(_cache_dir(file_name, tag))
+    return meta is not None and meta["source"] == _source_stamp(file_name)
+
+
+def load(file_name, tag, decode=True):
+    """
+    Открывает кэш колонок файла, если он есть и исходный файл не менялся
+
+    Числовые колонки отображаются в память (np.load с mmap_mode='r') и не копируются.
+    :param file_name: str
+        имя/полный путь исходного csv файла
+    :param tag: str
+        способ обработки
+    :param decode: bool
+        True - строковые колонки возвращаются массивом строк (None - пропуск),
+        False - парой (коды, словарь), код -1 - пропуск
+    :return: dict[str, ndarray | (ndarray, str[])] | None
+        колонки в исходном порядке или None, если кэша нет или он устарел
+    """
+    directory = _cache_dir(file_name, tag)
+    meta = _load_meta(directory)
+    if meta is None or meta["source"] != _source_stamp(file_name):
+        return None
+
+    columns = {}
+    for i, column in enumerate(meta["columns"]):
+        values = np.load(os.path.join(directory, f"{i}.npy"), mmap_mode="r")
+        if column["kind"] == "category":
+            with open(os.path.join(directory, f"{i}.vocab.json"), encoding="utf_8") as file:
+                vocab = json.load(file)
+            if decode:
+                lookup = np.array(vocab + [None], dtype=object)
+                values = lookup[values]
+            else:
+                values = (values, vocab)
+        columns[column["name"]] = values
+    return columns
+
+
+def _load_meta(directory):
+    """
+    :param directory: str
+        папка кэша
+    :return: dict | None
+        описание кэша или None, если его нет
+    """
+    try:
+        with open(os.path.join(directory, "meta.json"), encoding="utf_8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save(file_name, tag, columns, dtypes=None):
+    """
+    Сохраняет колонки файла в кэш
+
+    Числовые колонки сохраняются как .npy, строковые - словарным кодированием: коды int32 и словарь в json.
+    :param file_name: str
+        имя/полный путь исходного csv файла
+    :param tag: str
+        способ обработки
+    :param columns: dict[str, ndarray | array | (ndarray, str[]) | Sequence[str | None]]
+        колонки: числовой массив, готовая пара (коды, словарь) или последовательность строк (None/NaN - пропуск)
+    :param dtypes: dict[str, str] | None
+        типы колонок, которые нужно восстановить при чтении (для DataFrame)
+    """
+    directory = _cache_dir(file_name, tag)
+    source = _source_stamp(file_name)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+    meta_columns = []
+    for i, (name, values) in enumerate(columns.items()):
+        if isinstance(values, tuple):
+            codes, vocab = values
+        elif isinstance(values, (np.ndarray, array)) and np.asarray(values).dtype.kind in "iufb":
+            np.save(os.path.join(directory, f"{i}.npy"), np.asarray(values))
+            meta_columns.append({"name": name, "kind": "numeric"})
+            continue
+        else:
+            codes, vocab = _encode(values)
+        np.save(os.path.join(directory, f"{i}.npy"), np.asarray(codes, dtype=np.int32))
+        with open(os.path.join(directory, f"{i}.vocab.json"), "w", encoding="utf_8") as file:
+            json.dump(list(vocab), file, ensure_ascii=False)
+        meta_columns.append({"name": name, "kind": "category"})
+
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf_8") as file:
+        json.dump({"source": source, "columns": meta_columns, "dtypes": dtypes or {}}, file)
+
+
+def _encode(values):
+    """
+    Словарное кодирование строковой колонки
+    :param values: Sequence[str | None]
+        значения (None и NaN - пропуск)
+    :return: (ndarray, str[])
+        коды (-1 - пропуск) и словарь в порядке первого появления значений
+
+    >>> codes, vocab = _encode(["Москва", None, "Пермь", "Москва", float("nan")])
+    >>> codes.tolist(), vocab
+    ([0, -1, 1, 0, -1], ['Москва', 'Пермь'])
+    """
+    index = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None or value != value:
+            codes[i] = -1
+            continue
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        codes[i] = code
+    return codes, list(index)
+
+
+def read_csv(file_name, **kwargs):
+    """
+    Аналог pd.read_csv с кэшем: при первом чтении колонки сохраняются в двоичном виде,
+    при следующих - DataFrame собирается из отображённых в память массивов без разбора csv
+    :param file_name: str
+        имя/полный путь файла
+    :param kwargs:
+        параметры pd.read_csv (входят в ключ кэша)
+    :return: DataFrame
+    """
+    import pandas as pd
+
+    tag = "pandas"
+    if kwargs:
+        tag += "-" + hashlib.sha1(repr(sorted(kwargs.items())).encode("utf_8")).hexdigest()[:8]
+    columns = load(file_name, tag)
+    if columns is not None:
+        dtypes = _load_meta(_cache_dir(file_name, tag))["dtypes"]
+        return pd.DataFrame(dict((name, pd.Series(values).astype(dtypes[name]) if name in dtypes else values)
+                                 for name, values in columns.items()))
+
+    df = pd.read_csv(file_name, **kwargs)
+    numeric = [name for name in df.columns if df[name].dtype.kind in "iufb"]
+    save(file_name, tag, dict((name, df[name].to_numpy() if name in numeric else df[name].tolist())
+                              for name in df.columns),
+         dict((name, str(df[name].dtype)) for name in df.columns if name not in numeric))
+    return df
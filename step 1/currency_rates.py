@@ -0,0 +1,208 @@
+import csv
+import hashlib
+import os
+
+import numpy as np
+
+CURRENCIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module_3.3_API", "currencies.csv")
+
+# Курсы, которыми пользуются отчёты, если для валюты или месяца нет данных ЦБ РФ
+DEFAULT_RATES = {
+    "AZN": 35.68,
+    "BYR": 23.91,
+    "EUR": 59.90,
+    "GEL": 21.74,
+    "KGS": 0.76,
+    "KZT": 0.13,
+    "RUR": 1,
+    "UAH": 1.64,
+    "USD": 60.66,
+    "UZS": 0.0055,
+}
+
+
+class CurrencyRates:
+    """
+    Курсы валют к рублю по месяцам
+
+    Курсы хранятся плотной матрицей месяц x валюта: строка месяца считается арифметически от первого месяца таблицы,
+    столбец валюты - по словарю, поэтому поиск курса выполняется за O(1) без просмотра таблицы.
+
+    Atributes
+    ---------
+    first_month : int
+        номер первого месяца таблицы (год * 12 + месяц - 1)
+    currencies : dict[str, int]
+        валюта -> номер столбца матрицы
+    matrix : ndarray
+        курсы валют, NaN - курс неизвестен
+    fallback : dict[str, float] | None
+        курсы, используемые при отсутствии данных в таблице; None - курс неизвестен
+    fingerprint : str
+        отпечаток всех курсов (меняется вместе с данными, используется в ключах кэшей)
+
+    >>> rates = CurrencyRates(["2003-09", "2003-11"], ["USD", "EUR"], [[30.0, 35.0], [31.0, 36.0]])
+    >>> rates.get_rate("USD", "2003-11-07T00:00:00+0400"), rates.get_rate("RUR", "2003-11")
+    (31.0, 1.0)
+    >>> rates.get_rate("USD", "2003-10")
+    Traceback (most recent call last):
+    KeyError: 'Нет курса USD на 2003-10'
+    >>> rates.to_rub(100, "EUR", "2003-09-19")
+    3500.0
+    >>> rates.get_rates(["USD", "RUR", "EUR", "AZN"], ["2003-09-01", "2003-11-01", "2003-11-30", "2003-11-01"]).tolist()
+    [30.0, 1.0, 36.0, nan]
+    >>> CurrencyRates([], [], [], fallback=DEFAULT_RATES).get_rates(["USD", "XXX"], ["2022-01", "2022-01"]).tolist()
+    [60.66, nan]
+    """
+
+    _default = None
+
+    def __init__(self, months, currencies, values, fallback=None):
+        """
+        Инициализация обьекта
+        :param months: str[]
+            месяцы в виде ГГГГ-ММ
+        :param currencies: str[]
+            валюты
+        :param values: float[][]
+            курсы: строка на каждый месяц, столбец на каждую валюту
+        :param fallback: dict[str, float] | None
+            курсы на случай отсутствия данных в таблице
+        """
+        month_numbers = [CurrencyRates._month_number(m) for m in months]
+        self.first_month = min(month_numbers) if month_numbers else 0
+        self.currencies = dict((cur, i) for i, cur in enumerate(currencies))
+        self.fallback = fallback
+        size = max(month_numbers) - self.first_month + 1 if month_numbers else 0
+        self.matrix = np.full((size, len(currencies)), np.nan)
+        for number, row in zip(month_numbers, values):
+            if np.isnan(self.matrix[number - self.first_month]).all():
+                self.matrix[number - self.first_month] = np.asarray(row, dtype=float)
+        self.fingerprint = hashlib.sha1(repr((self.first_month, currencies, sorted((fallback or {}).items()))).encode()
+                                        + self.matrix.tobytes()).hexdigest()[:12]
+
+    @staticmethod
+    def _month_number(date):
+        """
+        :param date: str
+            дата, начинающаяся с ГГГГ-ММ
+        :return: int
+            год * 12 + месяц - 1
+        """
+        return int(date[:4]) * 12 + int(date[5:7]) - 1
+
+    @classmethod
+    def from_csv(cls, file_name=CURRENCIES_FILE, fallback=None):
+        """
+        Загружает курсы из csv файла, полученного с ЦБ РФ (module_3.3_API/task_1.py)
+        :param file_name: str
+            имя/полный путь файла
+        :param fallback: dict[str, float] | None
+            курсы на случай отсутствия данных в таблице
+        :return: CurrencyRates
+        """
+        with open(file_name, encoding="utf_8_sig") as file:
+            reader = csv.reader(file)
+            headers = next(reader)
+            rows = [row for row in reader if row]
+        date_index = headers.index("Date")
+        currencies = [h for i, h in enumerate(headers) if i != date_index]
+        values = [[float(v) if v != "" else np.nan for i, v in enumerate(row) if i != date_index] for row in rows]
+        return cls([row[date_index] for row in rows], currencies, values, fallback)
+
+    @classmethod
+    def from_frame(cls, df, fallback=None):
+        """
+        Загружает курсы из DataFrame со столбцом Date и столбцом на каждую валюту
+        :param df: DataFrame
+        :param fallback: dict[str, float] | None
+            курсы на случай отсутствия данных в таблице
+        :return: CurrencyRates
+        """
+        currencies = [c for c in df.columns if c != "Date"]
+        return cls(list(df["Date"]), currencies, df[currencies].to_numpy(dtype=float), fallback)
+
+    @classmethod
+    def get_default(cls):
+        """
+        Общий для всех отчётов экземпляр: курсы ЦБ РФ из module_3.3_API/currencies.csv с запасными курсами
+        DEFAULT_RATES. Файл читается один раз за процесс; если его нет, используются только запасные курсы.
+        :return: CurrencyRates
+        """
+        if cls._default is None:
+            if os.path.exists(CURRENCIES_FILE):
+                cls._default = cls.from_csv(CURRENCIES_FILE, DEFAULT_RATES)
+            else:
+                cls._default = cls([], [], [], DEFAULT_RATES)
+        return cls._default
+
+    def get_rate(self, currency, date=None):
+        """
+        Курс валюты к рублю
+        :param currency: str
+            код валюты
+        :param date: str | None
+            дата, начинающаяся с ГГГГ-ММ; None - использовать запасной курс
+        :return: float
+            курс
+        :raises KeyError: курс неизвестен (нет ни в таблице, ни в запасных курсах), чтобы NaN не попадал в суммы
+        """
+        if currency == "RUR":
+            return 1.0
+        col = self.currencies.get(currency)
+        if col is not None and date is not None:
+            row = CurrencyRates._month_number(date) - self.first_month
+            if 0 <= row < len(self.matrix):
+                rate = self.matrix[row, col]
+                if rate == rate:
+                    return float(rate)
+        if self.fallback is not None and currency in self.fallback:
+            return float(self.fallback[currency])
+        raise KeyError(f"Нет курса {currency}" + (f" на {date[:7]}" if date is not None else ""))
+
+    def to_rub(self, amount, currency, date=None):
+        """
+        Переводит сумму в рубли
+        :param amount: float
+            сумма
+        :param currency: str
+            код валюты
+        :param date: str | None
+            дата, начинающаяся с ГГГГ-ММ
+        :return: float
+        :raises KeyError: курс неизвестен
+        """
+        return amount * self.get_rate(currency, date)
+
+    def get_rates(self, currencies, dates):
+        """
+        Курсы сразу для массива валют и дат. В отличие от get_rate, неизвестный курс не ошибка: для столбцов
+        DataFrame он возвращается как NaN (как и неуказанный оклад), вызывающий код должен отбросить такие строки
+        :param currencies: Sequence[str]
+            коды валют
+        :param dates: Sequence[str]
+            даты, начинающиеся с ГГГГ-ММ
+        :return: ndarray
+            курсы, NaN - если курс неизвестен
+        """
+        currencies = np.asarray(currencies, dtype=str)
+        digits = np.asarray(dates, dtype="U7").view(np.uint32).reshape(-1, 7).astype(np.int64) - ord("0")
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 5] * 10 + digits[:, 6]
+        valid = ((digits[:, [0, 1, 2, 3, 5, 6]] >= 0) & (digits[:, [0, 1, 2, 3, 5, 6]] <= 9)).all(axis=1) \
+            & (month >= 1) & (month <= 12)
+        row = np.where(valid, year * 12 + month - 1 - self.first_month, -1)
+
+        unique, inverse = np.unique(currencies, return_inverse=True)
+        col = np.array([self.currencies.get(cur, -1) for cur in unique], dtype=np.int64)[inverse.reshape(-1)]
+
+        rates = np.full(len(currencies), np.nan)
+        found = (row >= 0) & (row < len(self.matrix)) & (col >= 0)
+        rates[found] = self.matrix[row[found], col[found]]
+
+        if self.fallback is not None:
+            missing = np.isnan(rates)
+            fallback = np.array([self.fallback.get(cur, np.nan) for cur in unique], dtype=float)[inverse.reshape(-1)]
+            rates[missing] = fallback[missing]
+        rates[currencies == "RUR"] = 1.0
+        return rates
@@ -0,0 +1,143 @@
+import atexit
+import concurrent.futures as con_fut
+import multiprocessing
+import os
+
+BACKENDS = ("serial", "thread", "process", "futures")
+
+# Пулы, созданные Executor: (бэкенд, количество исполнителей) -> пул. Переиспользуются между вызовами,
+# чтобы не запускать процессы заново для каждой статистики
+_pools = {}
+
+
+class Executor:
+    """
+    Выполнение одной функции над набором заданий выбранным способом
+
+    Бэкенды:
+        serial - в текущем потоке;
+        thread - concurrent.futures.ThreadPoolExecutor;
+        process - multiprocessing.Pool;
+        futures - concurrent.futures.ProcessPoolExecutor.
+    Задания запускаются в порядке убывания веса (например, размера файла), чтобы самое долгое задание
+    не начиналось последним, а результаты возвращаются в исходном порядке заданий.
+
+    Atributes
+    ---------
+    backend : str
+        способ выполнения
+    workers : int | None
+        количество потоков/процессов (None - количество ядер)
+
+    >>> Executor("thread", 2).starmap(pow, [(2, 3), (3, 2), (10, 0)], weights=[1, 5, 3])
+    [8, 9, 1]
+    >>> Executor("serial").map_files(len, ["a", "bb"])
+    [1, 2]
+    """
+
+    def __init__(self, backend="process", workers=None):
+        """
+        Инициализация обьекта
+        :param backend: str
+            способ выполнения (см. BACKENDS)
+        :param workers: int | None
+            количество потоков/процессов
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный способ выполнения: {backend}")
+        self.backend = backend
+        self.workers = workers
+
+    def starmap(self, func, args_list, weights=None):
+        """
+        :param func: Callable
+            функция (для process и futures - доступная через pickle)
+        :param args_list: tuple[]
+            аргументы заданий
+        :param weights: float[] | None
+            веса заданий: задания с большим весом запускаются раньше
+        :return: list
+            результаты в порядке args_list
+        """
+        args_list = list(args_list)
+        if self.backend == "serial" or not args_list:
+            return [func(*args) for args in args_list]
+
+        order = list(range(len(args_list)))
+        if weights is not None:
+            order.sort(key=lambda i: weights[i], reverse=True)
+        workers = self.workers or os.cpu_count() or 1
+        pool = get_pool(self.backend, workers)
+
+        results = [None] * len(args_list)
+        if self.backend == "process":
+            # chunksize=1: каждое задание выдаётся отдельно, как только освобождается процесс
+            for i, result in zip(order, pool.imap(_Call(func), [args_list[i] for i in order], chunksize=1)):
+                results[i] = result
+        else:
+            futures = dict((pool.submit(func, *args_list[i]), i) for i in order)
+            for future, i in futures.items():
+                results[i] = future.result()
+        return results
+
+    def map_files(self, func, files, *args):
+        """
+        Вызывает func(file, *args) для каждого файла, начиная с самых больших
+        :param func: Callable
+            функция обработки файла
+        :param files: str[]
+            пути к файлам
+        :param args:
+            общие аргументы для всех файлов
+        :return: list
+            результаты в порядке files
+        """
+        files = list(files)
+        weights = [os.path.getsize(file) if os.path.exists(file) else 0 for file in files]
+        return self.starmap(func, [(file,) + args for file in files], weights)
+
+
+class _Call:
+    """
+    Распаковка аргументов задания для multiprocessing.Pool.imap
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, args):
+        return self.func(*args)
+
+
+def get_pool(backend, workers):
+    """
+    Возвращает пул нужного вида, при первом обращении создаёт его
+    :param backend: str
+        thread, process или futures
+    :param workers: int
+        количество потоков/процессов
+    :return: multiprocessing.Pool | concurrent.futures.Executor
+    """
+    key = (backend, workers)
+    if key not in _pools:
+        if backend == "process":
+            _pools[key] = multiprocessing.Pool(workers)
+        elif backend == "futures":
+            _pools[key] = con_fut.ProcessPoolExecutor(max_workers=workers)
+        else:
+            _pools[key] = con_fut.ThreadPoolExecutor(max_workers=workers)
+    return _pools[key]
+
+
+@atexit.register
+def shutdown():
+    """
+    Закрывает все созданные пулы
+    """
+    while _pools:
+        _, pool = _pools.popitem()
+        if isinstance(pool, con_fut.Executor):
+            pool.shutdown()
+        else:
+            pool.close()
+            pool.join()
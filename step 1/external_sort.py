@@ -0,0 +1,103 @@
+import heapq
+import os
+import pickle
+import tempfile
+from itertools import islice
+from operator import itemgetter
+
+# Записи прогона пишутся и читаются пачками, чтобы не вызывать pickle на каждую запись
+BATCH_SIZE = 1000
+
+
+def external_sort(records, key, reverse=False, run_size=100000, temp_dir=None):
+    """
+    Устойчивая сортировка потока записей, который не помещается в память
+
+    Записи читаются прогонами по run_size штук, каждый прогон сортируется по заранее вычисленным ключам
+    и вместе с ключами сбрасывается во временный файл. Затем прогоны сливаются (heapq.merge), в памяти
+    одновременно находятся один прогон при записи и по одной пачке каждого прогона при слиянии.
+    Если все записи поместились в один прогон, временные файлы не создаются.
+    Порядок совпадает с sorted(records, key=key, reverse=reverse).
+    :param records: Iterable
+        записи (должны сохраняться через pickle)
+    :param key: Callable
+        ключ сортировки записи
+    :param reverse: bool
+        сортировка по убыванию
+    :param run_size: int
+        количество записей в прогоне
+    :param temp_dir: str | None
+        папка для временных файлов (None - системная)
+    :return: Iterator
+        записи в порядке сортировки
+
+    >>> words = ['груша', 'Яблоко', 'арбуз', 'Банан', 'вишня', 'Абрикос', 'дыня']
+    >>> list(external_sort(words, key=len, run_size=3)) == sorted(words, key=len)
+    True
+    >>> list(external_sort(words, key=len, reverse=True, run_size=2)) == sorted(words, key=len, reverse=True)
+    True
+    """
+    records = iter(records)
+    run = _sorted_run(records, key, reverse, run_size)
+    if len(run) < run_size:
+        return (record for _, record in run)
+    return _merge_runs(run, records, key, reverse, run_size, temp_dir)
+
+
+def _sorted_run(records, key, reverse, run_size):
+    """
+    :return: (object, object)[]
+        следующие run_size записей с ключами, отсортированные по ключу
+    """
+    run = [(key(record), record) for record in islice(records, run_size)]
+    run.sort(key=itemgetter(0), reverse=reverse)
+    return run
+
+
+def _merge_runs(run, records, key, reverse, run_size, temp_dir):
+    """
+    Сбрасывает прогоны во временные файлы и сливает их
+    :param run: (object, object)[]
+        первый отсортированный прогон
+    :param records: Iterator
+        оставшиеся записи
+    :return: Iterator
+        записи в порядке сортировки
+    """
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+        files = []
+        while run:
+            files.append(os.path.join(directory, f'run_{len(files)}.pickle'))
+            _write_run(files[-1], run)
+            run = _sorted_run(records, key, reverse, run_size)
+        # heapq.merge устойчив: при равных ключах раньше выдаётся запись более раннего прогона
+        for _, record in heapq.merge(*[_read_run(file) for file in files], key=itemgetter(0), reverse=reverse):
+            yield record
+
+
+def _write_run(file_name, run):
+    """
+    :param file_name: str
+        временный файл прогона
+    :param run: (object, object)[]
+        отсортированные записи с ключами
+    """
+    with open(file_name, 'wb') as file:
+        for start in range(0, len(run), BATCH_SIZE):
+            pickle.dump(run[start:start + BATCH_SIZE], file, pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(file_name):
+    """
+    :param file_name: str
+        временный файл прогона
+    :return: Iterator[(object, object)]
+        записи прогона с ключами
+    """
+    with open(file_name, 'rb') as file:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
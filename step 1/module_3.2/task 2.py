@@ -1,12 +1,21 @@
-import multiprocessing
 import cProfile
 import os
-import pandas as pd
-import concurrent.futures as con_fut
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import csv_cache
+from currency_rates import CurrencyRates
+from executor import Executor
+from partition_manifest import select_partitions
+import profiler
+from timestamps import Timestamps
+from year_partitioner import partition_by_year, read_partition
 
 
 class Solution:
-    def __init__(self, file_path, profession):
+    def __init__(self, file_path, profession, years=None):
         """
         Инициализация объекта
 
@@ -14,9 +23,12 @@ class Solution:
             файл/путь к файлу с данными
         :param profession: str
             требуемая профессия, по которой будет составляться аналитика
+        :param years: (int, int) | None
+            диапазон годов включительно (None - все годы)
         """
         self.file_path = file_path
         self.profession = profession
+        self.years = years
 
         self.salary_by_years = {}
         self.count_by_years = {}
@@ -28,44 +40,68 @@ class Solution:
     def divide_file_by_year(self):
         """
         Разделяет входной файл на более мелкие, группирую по годам
+
+        Файл читается потоково, кусками (см. year_partitioner.partition_by_year)
         """
-        df = pd.read_csv(self.file_path)
-        df["year"] = df["published_at"].apply(lambda s: s[:4])
-        df = df.groupby("year")
-        for year, data in df:
-            data[["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]].to_csv(
-                rf"csv_files\part_{year}.csv", index=False)
+        with profiler.stage("partition") as current:
+            counts = partition_by_year(self.file_path, "csv_files",
+                                       ["name", "salary_from", "salary_to", "salary_currency", "area_name",
+                                        "published_at"])
+            current.rows = sum(counts.values())
 
     def get_statistic(self):
         self.create_statistic_by_year_mltproc_on()
         self.get_statistic_by_city()
 
+    @staticmethod
+    def _salary_in_rubles(df):
+        """
+        Средний оклад вакансий в рублях: среднее границ вилки по курсу валюты на месяц публикации
+        :param df: DataFrame
+            вакансии со столбцами salary_from, salary_to, salary_currency, published_at
+        :return: ndarray
+            оклад в рублях, NaN - если оклад не указан
+        :raises KeyError: курс валюты вакансии с окладом неизвестен
+        """
+        salary = df[["salary_from", "salary_to"]].mean(axis=1).to_numpy()
+        currencies = df["salary_currency"].astype(str).to_numpy()
+        dates = df["published_at"].astype(str).to_numpy()
+        rates = CurrencyRates.get_default().get_rates(currencies, dates)
+        unknown = np.flatnonzero(np.isnan(rates) & ~np.isnan(salary))
+        if len(unknown):
+            raise KeyError(f"Нет курса {currencies[unknown[0]]} на {dates[unknown[0]][:7]}")
+        return salary * rates
+
     def get_statistic_by_year(self, file_csv):
         """
         Сосавляет статистику по году
         :param file_csv: str
-            файл с данными за год
-        :return: (str, [int, int, int, int])
+            файл с данными за год (csv или parquet)
+        :return: (int, [int, int, int, int])
             (год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии])
         """
-        df = pd.read_csv(file_csv)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
-        df["published_at"] = df["published_at"].apply(lambda s: int(s[:4]))
+        df = read_partition(file_csv)
+        df["salary"] = Solution._salary_in_rubles(df)
+        df["published_at"] = Timestamps(df["published_at"]).year
         df_vac = df[df["name"].str.contains(self.profession)]
 
-        return df["published_at"].values[0], [int(df["salary"].mean()), len(df),
-                                              int(df_vac["salary"].mean() if len(df_vac) != 0 else 0), len(df_vac)]
+        return int(df["published_at"].values[0]), [int(df["salary"].mean()), len(df),
+                                                   int(df_vac["salary"].mean() if len(df_vac) != 0 else 0), len(df_vac)]
 
-    def create_statistic_by_year_mltproc_off(self):
+    def create_statistic_by_year(self, backend="process", workers=None):
         """
         Собирает статистику по годам
 
-        Использует только один процесс для работы
+        Файлы годов обрабатываются через executor.Executor, начиная с самых больших
+        :param backend: str
+            способ выполнения: serial, thread, process или futures
+        :param workers: int | None
+            количество потоков/процессов (по умолчанию - количество ядер)
         """
-        res_list = []
-        for filename in os.listdir("csv_files"):
-            with open(os.path.join("csv_files", filename), "r") as file_csv:
-                res_list.append(self.get_statistic_by_year(file_csv.name))
+        files = select_partitions("csv_files", years=self.years)
+        with profiler.stage("aggregate by year") as current:
+            res_list = Executor(backend, workers).map_files(self.get_statistic_by_year, files)
+            current.rows = sum(data_stat[1] for _, data_stat in res_list)
 
         for year, data_stat in res_list:
             self.salary_by_years[year] = data_stat[0]
@@ -73,22 +109,21 @@ class Solution:
             self.prof_salary_by_years[year] = data_stat[2]
             self.prof_count_by_years[year] = data_stat[3]
 
+    def create_statistic_by_year_mltproc_off(self):
+        """
+        Собирает статистику по годам
+
+        Использует только один процесс для работы
+        """
+        self.create_statistic_by_year("serial")
+
     def create_statistic_by_year_mltproc_on(self):
         """
         Собирает статистику по годам
 
         Использует несколько процессов для работы
         """
-        files = [rf"csv_files\{file_name}" for file_name in os.listdir("csv_files")]
-        pool = multiprocessing.Pool(4)
-        res_list = pool.starmap(self.get_statistic_by_year, [(file,) for file in files])
-        pool.close()
-
-        for year, data_stat in res_list:
-            self.salary_by_years[year] = data_stat[0]
-            self.count_by_years[year] = data_stat[1]
-            self.prof_salary_by_years[year] = data_stat[2]
-            self.prof_count_by_years[year] = data_stat[3]
+        self.create_statistic_by_year("process")
 
     def create_statistic_by_year_concurrent_futures(self):
         """
@@ -96,29 +131,22 @@ class Solution:
 
         Использует модуль concurrent futures для работы
         """
-        files = [rf"csv_files\{file_name}" for file_name in os.listdir("csv_files")]
-        with con_fut.ProcessPoolExecutor(max_workers=4) as executer:
-            res = executer.map(self.get_statistic_by_year, files)
-        res_list = list(res)
-
-        for year, data_stat in res_list:
-            self.salary_by_years[year] = data_stat[0]
-            self.count_by_years[year] = data_stat[1]
-            self.prof_salary_by_years[year] = data_stat[2]
-            self.prof_count_by_years[year] = data_stat[3]
+        self.create_statistic_by_year("futures")
 
     def get_statistic_by_city(self):
         """
         Собирает статистику по городам
         """
-        df = pd.read_csv(self.file_path)
-        total = len(df)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
-        df["count"] = df.groupby("area_name")["area_name"].transform("count")
-        df = df[df["count"] > total * 0.01]
-        df = df.groupby("area_name", as_index=False)
-        df = df[["salary", "count"]].mean().sort_values("salary", ascending=False)
-        df["salary"] = df["salary"].apply(lambda s: int(s))
+        with profiler.stage("read") as current:
+            df = csv_cache.read_csv(self.file_path)
+            current.rows = total = len(df)
+        with profiler.stage("aggregate by city", total):
+            df["salary"] = Solution._salary_in_rubles(df)
+            df["count"] = df.groupby("area_name")["area_name"].transform("count")
+            df = df[df["count"] > total * 0.01]
+            df = df.groupby("area_name", as_index=False)
+            df = df[["salary", "count"]].mean().sort_values("salary", ascending=False)
+            df["salary"] = df["salary"].apply(lambda s: int(s))
 
         self.salary_by_cities = dict(zip(df.head(10)["area_name"], df.head(10)["salary"]))
 
@@ -141,7 +169,8 @@ if __name__ == '__main__':
     profession = input("Введите название профессии: ")
     solve = Solution(file, profession)
     # solve.divide_file_by_year()
-    solve.get_statistic()
+    with profiler.stage("statistic"):
+        solve.get_statistic()
     solve.print_statistic()
 
     # solve = Solution("..\\..\\Data\\vacancies_by_year.csv", "Программист")
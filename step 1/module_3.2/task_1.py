@@ -1,5 +1,10 @@
+import os
+import sys
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from year_partitioner import partition_by_year
+
 pd.set_option("display.max_columns", False)
 pd.set_option("expand_frame_repr", False)
 
@@ -8,11 +13,8 @@ def section_by_year(file_path="..\\..\\Data\\vacancies_by_year.csv"):
     """
     Разделяет входной файл на более мелкие, группирую по годам
 
+    Файл читается потоково, кусками (см. year_partitioner.partition_by_year)
     :param file_path: str
     """
-    df = pd.read_csv(file_path)
-    df["year"] = df["published_at"].apply(lambda s: s[:4])
-    df = df.groupby("year")
-    for year, data in df:
-        data[["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]].to_csv(
-            rf"csv_files\part_{year}.csv", index=False)
+    partition_by_year(file_path, "csv_files",
+                      ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"])
@@ -1,9 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
 import pandas as pd
 import requests
 
 pd.set_option("display.max_columns", False)
 pd.set_option("expand_frame_repr", False)
 
+# Ежедневные курсы ЦБ РФ (XML), дата передаётся параметром date_req=ДД/ММ/ГГГГ
+CBR_URL = "https://www.cbr.ru/scripts/XML_daily.asp"
+# Одновременных запросов к ЦБ, попыток на одну дату и пауза перед второй попыткой (дальше удваивается)
+CONCURRENCY = 8
+RETRIES = 4
+BACKOFF = 0.5
+
 
 def get_currencies_and_dates(file_path="..\\..\\Data\\vacancies_dif_currencies.csv"):
     """
@@ -28,9 +39,111 @@ def get_currencies_and_dates(file_path="..\\..\\Data\\vacancies_dif_currencies.c
     return currency_list, dates
 
 
-def get_ruble_exchange_rate():
+def parse_rates(stream, currency):
+    """
+    Потоково разбирает XML ЦБ РФ: элементы валют освобождаются сразу после чтения
+    :param stream: BinaryIO
+        XML ответа (файл или поток ответа)
+    :param currency: str[]
+        нужные валюты; для BYR подходит и BYN (после деноминации 2016 года)
+    :return: dict[str, float]
+        валюта - курс за одну единицу валюты в рублях
+
+    >>> import io
+    >>> xml = ('<?xml version="1.0" encoding="windows-1251"?><ValCurs Date="01.07.2016" name="Foreign Currency Market">'
+    ...        '<Valute ID="R01090B"><NumCode>933</NumCode><CharCode>BYN</CharCode><Nominal>1</Nominal>'
+    ...        '<Name>B</Name><Value>32,0758</Value></Valute><Valute ID="R01335"><NumCode>398</NumCode>'
+    ...        '<CharCode>KZT</CharCode><Nominal>100</Nominal><Name>K</Name><Value>18,8979</Value></Valute></ValCurs>')
+    >>> parse_rates(io.BytesIO(xml.encode("cp1251")), ["BYR", "KZT", "USD"])
+    {'BYR': 32.0758, 'KZT': 0.188979}
+    """
+    rates = {}
+    for _, element in ElementTree.iterparse(stream):
+        if element.tag != "Valute":
+            continue
+        code = element.findtext("CharCode")
+        code = "BYR" if code == "BYN" else code
+        if code in currency and code not in rates:
+            value = float(element.findtext("Value").replace(",", "."))
+            rates[code] = round(value / float(element.findtext("Nominal")), 7)
+        element.clear()
+    return rates
+
+
+def _fetch_rates(url, currency, timeout):
+    """
+    Блокирующий запрос курсов за одну дату (выполняется в отдельном потоке)
+    :param url: str
+        адрес XML с курсами
+    :param currency: str[]
+        нужные валюты
+    :param timeout: float
+        таймаут запроса в секундах
+    :return: dict[str, float]
+        валюта - курс в рублях
+    """
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return parse_rates(response.raw, currency)
+
+
+async def _fetch_date(date, currency, executor, semaphore, base_url, retries, backoff, timeout):
+    """
+    Курсы за первое число месяца с повторами: пауза перед каждой следующей попыткой удваивается
+    :param date: str
+        месяц вида ММ/ГГГГ
+    :return: dict[str, float]
+        валюта - курс в рублях
+    """
+    url = f"{base_url}?date_req=01/{date}"
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                return await asyncio.get_running_loop().run_in_executor(executor, _fetch_rates, url, currency,
+                                                                        timeout)
+        except (requests.RequestException, ElementTree.ParseError):
+            if attempt == retries - 1:
+                raise
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def fetch_exchange_rates(currency, dates, base_url=CBR_URL, concurrency=CONCURRENCY, retries=RETRIES,
+                               backoff=BACKOFF, timeout=30):
+    """
+    Загружает курсы за все месяцы одновременно (не более concurrency запросов сразу)
+    :param currency: str[]
+        валюты
+    :param dates: str[]
+        месяцы вида ММ/ГГГГ
+    :param base_url: str
+        адрес XML_daily.asp (можно подменить локальным сервером)
+    :param concurrency: int
+        максимум одновременных запросов
+    :param retries: int
+        попыток на одну дату
+    :param backoff: float
+        пауза перед второй попыткой в секундах
+    :param timeout: float
+        таймаут запроса в секундах
+    :return: DataFrame
+        столбцы Date (ГГГГ-ММ) и валюты; строки в порядке dates, отсутствующий курс - NaN
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    # requests блокирующий, поэтому запросы выполняются в своём пуле потоков размером concurrency
+    with ThreadPoolExecutor(concurrency) as executor:
+        rates = await asyncio.gather(*[_fetch_date(date, currency, executor, semaphore, base_url, retries, backoff,
+                                                   timeout) for date in dates])
+    rows = [["-".join(reversed(date.split("/")))] + [date_rates.get(cur) for cur in currency]
+            for date, date_rates in zip(dates, rates)]
+    return pd.DataFrame(rows, columns=['Date'] + currency)
+
+
+def get_ruble_exchange_rate(base_url=CBR_URL):
     """
     Составляет курс валют за некоторый период в виде csv файла по данным ЦБ РФ
+    :param base_url: str
+        адрес XML_daily.asp
     """
     # currency, dates = get_currencies_and_dates()
     currency = ['BYR', 'EUR', 'KZT', 'UAH', 'USD']
@@ -81,24 +194,10 @@ def get_ruble_exchange_rate():
              '07/2021', '08/2021', '09/2021', '10/2021', '11/2021', '12/2021', '01/2022', '02/2022', '03/2022',
              '04/2022',
              '05/2022', '06/2022', '07/2022']
-    res_df = pd.DataFrame(columns=['Date'] + currency)
-    for date in dates:
-        response = requests.get(f"https://www.cbr.ru/scripts/XML_daily.asp?date_req=01/{date}")
-        df_cur = pd.read_xml(response.text)
-        lst = ["-".join(reversed(date.split("/")))]
-        for cur in currency:
-            if cur == 'BYR':
-                record_cur = df_cur.loc[df_cur["CharCode"].isin(['BYN', cur])]
-            else:
-                record_cur = df_cur.loc[df_cur["CharCode"] == cur]
-            lst.append(
-                round(float(record_cur["Value"].values[0].replace(',', '.')) / float(record_cur["Nominal"].values[0]),
-                      7))
-
-        res_df.loc[len(res_df.index)] = lst
-
+    res_df = asyncio.run(fetch_exchange_rates(currency, dates, base_url))
     res_df.to_csv("currencies.csv", index=False)
     print(res_df.head())
 
 
-get_ruble_exchange_rate()
+if __name__ == '__main__':
+    get_ruble_exchange_rate()
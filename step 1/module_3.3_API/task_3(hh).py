@@ -1,52 +1,201 @@
+import asyncio
 import csv
-import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
 import requests
 
-def get_page(page, time_from, time_to, date):
+API_URL = 'https://api.hh.ru/vacancies'
+PER_PAGE = 100
+# API отдаёт не больше 2000 вакансий на один запрос (page * per_page < 2000), окна с большим числом дробятся
+MAX_RESULTS = 2000
+# Частота запросов (в секунду) и сколько запросов можно сделать подряд без ожидания
+RATE = 4
+BURST = 4
+CONCURRENCY = 8
+RETRIES = 4
+BACKOFF = 0.5
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S+0300'
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов: токены пополняются со скоростью rate в секунду, но копятся не больше capacity.
+    Каждый запрос забирает один токен, при их отсутствии - ждёт пополнения.
+    """
+    def __init__(self, rate, capacity):
+        """
+        :param rate: Скорость пополнения, токенов в секунду (float)
+        :param capacity: Максимум накопленных токенов (int)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Забирает один токен, при необходимости дожидаясь его.
+        """
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def get_page(page, date_from, date_to, base_url=API_URL, timeout=30):
     """
     Получает ответ на запрос с api.hh.ru: список IT-вакансий в формате .json.
     :param page: Номер страницы, с которой приходит вакансия (int)
-    :param time_from: Начало временного промежутка, с которого начинается выбор вакансии (str)
-    :param time_to: Конец временного промежутка, на котором заканчивается выбор вакансии (str)
-    :param date: Дата, когда была опубликована вакансия (str)
+    :param date_from: Начало временного промежутка, с которого начинается выбор вакансии (datetime)
+    :param date_to: Конец временного промежутка, на котором заканчивается выбор вакансии, включительно (datetime)
+    :param base_url: Адрес API вакансий, можно подменить локальным сервером (str)
+    :param timeout: Таймаут запроса в секундах (float)
     :return: Список IT-вакансий в формате .json
     """
     params = {
         'specialization': 1,
         'page': page,
-        'per_page': 100,
-        'date_from': f'{date}T{time_from}+0300',
-        'date_to': f'{date}T{time_to}+0300',
+        'per_page': PER_PAGE,
+        'date_from': date_from.strftime(DATE_FORMAT),
+        'date_to': date_to.strftime(DATE_FORMAT),
     }
 
-    req = requests.get('https://api.hh.ru/vacancies', params).json()
-    return req
+    response = requests.get(base_url, params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
 
-def add_csv_vacancy():
+def vacancy_row(vacancy):
     """
-    Добавляет нужные поля вакансии в CSV-файл, итерируясь по страницам и промежуткам времени.
+    Строка CSV-файла для вакансии.
+    :param vacancy: Вакансия из ответа API (dict)
+    :return: Поля name, salary_from, salary_to, salary_currency, area_name, published_at (list)
     """
-    for hour in range(0, 23, 2):
-        next_hour = hour + 1
-        if hour < 10:
-            hour = f'0{hour}'
-        if next_hour < 10:
-            next_hour = f'0{next_hour}'
-        for page in range(0, 20):
-            vacancies = get_page(page, f'{hour}:00:00', f'{next_hour}:59:59', '2022-12-20')
-            with open(f"hhVacancies.csv", mode="a", encoding='utf-8-sig') as w_file:
-                file_writer = csv.writer(w_file, delimiter=',', lineterminator="\r")
-                for row in vacancies['items']:
-                    if row['salary'] is None:
-                        file_writer.writerow([row['name'], '', '', '', row['area']['name'], row['published_at']])
-                    else:
-                        file_writer.writerow([row['name'], row['salary']['from'], row['salary']['to'],
-                                              row['salary']['currency'], row['area']['name'], row['published_at']])
+    salary = vacancy['salary']
+    if salary is None:
+        return [vacancy['name'], '', '', '', vacancy['area']['name'], vacancy['published_at']]
+    return [vacancy['name'], salary['from'], salary['to'], salary['currency'], vacancy['area']['name'],
+            vacancy['published_at']]
 
-            if (vacancies['pages'] - page) <= 1:
-                break
+class Harvester:
+    """
+    Асинхронный сбор вакансий: страницы окна запрашиваются параллельно (с ограничением частоты), окно, в котором
+    вакансий больше, чем API отдаёт постранично, делится пополам, пока не уложится в лимит.
+    Вакансии передаются через очередь единственной задаче записи в CSV-файл.
+    """
+    def __init__(self, base_url, executor, bucket, queue):
+        """
+        :param base_url: Адрес API вакансий (str)
+        :param executor: Пул потоков для блокирующих запросов (ThreadPoolExecutor)
+        :param bucket: Ограничитель частоты запросов (TokenBucket)
+        :param queue: Очередь списков строк для записи (asyncio.Queue)
+        """
+        self.base_url = base_url
+        self.executor = executor
+        self.bucket = bucket
+        self.queue = queue
+
+    async def fetch(self, page, date_from, date_to):
+        """
+        Запрашивает страницу с повторами: пауза перед каждой следующей попыткой удваивается.
+        :return: Ответ API (dict)
+        """
+        for attempt in range(RETRIES):
+            await self.bucket.acquire()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, get_page, page, date_from, date_to, self.base_url)
+            except requests.RequestException:
+                if attempt == RETRIES - 1:
+                    raise
+            await asyncio.sleep(BACKOFF * 2 ** attempt)
 
-            time.sleep(0.25)
+    async def harvest(self, date_from, date_to):
+        """
+        Собирает все вакансии временного промежутка.
+        Окно в одну секунду делить дальше нельзя: если в нём больше MAX_RESULTS вакансий, собираются только первые
+        MAX_RESULTS, а о потере предупреждает RuntimeWarning.
+        :param date_from: Начало промежутка (datetime)
+        :param date_to: Конец промежутка включительно (datetime)
+        """
+        first = await self.fetch(0, date_from, date_to)
+        if first['found'] > MAX_RESULTS:
+            if date_to > date_from:
+                middle = date_from + (date_to - date_from) // 2
+                middle -= timedelta(microseconds=middle.microsecond)
+                await asyncio.gather(self.harvest(date_from, middle),
+                                     self.harvest(middle + timedelta(seconds=1), date_to))
+                return
+            warnings.warn(f"За {date_from:%Y-%m-%d %H:%M:%S} опубликовано {first['found']} вакансий, API отдаёт "
+                          f"только {MAX_RESULTS}: {first['found'] - MAX_RESULTS} не будут собраны", RuntimeWarning)
+
+        pages = min(first['pages'], MAX_RESULTS // PER_PAGE)
+        rest = await asyncio.gather(*[self.fetch(page, date_from, date_to) for page in range(1, pages)])
+        for vacancies in [first] + rest:
+            await self.queue.put([vacancy_row(row) for row in vacancies['items']])
+
+async def write_rows(queue, file_name):
+    """
+    Задача записи: дописывает строки из очереди в CSV-файл, пока не придёт None.
+    :param queue: Очередь списков строк (asyncio.Queue)
+    :param file_name: Имя CSV-файла (str)
+    """
+    with open(file_name, mode="a", encoding='utf-8-sig', buffering=1 << 20) as w_file:
+        file_writer = csv.writer(w_file, delimiter=',', lineterminator="\r")
+        while True:
+            rows = await queue.get()
+            if rows is None:
+                return
+            file_writer.writerows(rows)
+
+async def harvest_vacancies(date, file_name="hhVacancies.csv", base_url=API_URL, rate=RATE):
+    """
+    Собирает все IT-вакансии, опубликованные за день, в CSV-файл.
+    Ошибка записи отменяет сбор: иначе он навсегда встал бы на queue.put в заполненную очередь, которую никто не читает.
+    :param date: Дата публикации (str)
+    :param file_name: Имя CSV-файла (str)
+    :param base_url: Адрес API вакансий (str)
+    :param rate: Максимум запросов в секунду (float)
+    """
+    date_from = datetime.strptime(date, '%Y-%m-%d')
+    queue = asyncio.Queue(maxsize=CONCURRENCY * 4)
+    writer = asyncio.create_task(write_rows(queue, file_name))
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        harvester = Harvester(base_url, executor, TokenBucket(rate, BURST), queue)
+        harvest = asyncio.create_task(harvester.harvest(date_from, date_from + timedelta(days=1, seconds=-1)))
+        try:
+            # Запись завершается раньше сбора только с ошибкой
+            await asyncio.wait({harvest, writer}, return_when=asyncio.FIRST_COMPLETED)
+            if writer.done():
+                harvest.cancel()
+                await asyncio.gather(harvest, return_exceptions=True)
+                writer.result()
+            # Признак конца ставится так, чтобы не зависнуть, если запись упадёт на оставшихся в очереди строках
+            stop = asyncio.create_task(queue.put(None))
+            await asyncio.wait({stop, writer}, return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+            await asyncio.wait({writer})
+            harvest.result()
+            writer.result()
+        finally:
+            harvest.cancel()
+            writer.cancel()
+
+def add_csv_vacancy(date='2022-12-20', file_name="hhVacancies.csv", base_url=API_URL):
+    """
+    Добавляет нужные поля вакансий за день в CSV-файл.
+    :param date: Дата публикации (str)
+    :param file_name: Имя CSV-файла (str)
+    :param base_url: Адрес API вакансий (str)
+    """
+    asyncio.run(harvest_vacancies(date, file_name, base_url))
 
 if __name__ == '__main__':
     with open(f"hhVacancies.csv", mode="a", encoding='utf-8-sig') as w_file:
@@ -54,4 +203,3 @@ if __name__ == '__main__':
         file_writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
     add_csv_vacancy()
 
-
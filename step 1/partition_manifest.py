@@ -0,0 +1,258 @@
+import hashlib
+import json
+import math
+import os
+import re
+
+from timestamps import Timestamps
+
+MANIFEST_NAME = "manifest.json"
+# Имена файлов партиций, которые пишет year_partitioner
+PARTITION_NAME = re.compile(r"part_\d{4}\.(csv|parquet)")
+
+# До этого количества регионы партиции хранятся списком, дальше - фильтром Блума
+MAX_LISTED_AREAS = 256
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для проверки, может ли регион встречаться в партиции
+
+    Ложноотрицательных ответов нет, вероятность ложноположительного - около error_rate.
+
+    Atributes
+    ---------
+    size : int
+        количество бит
+    hashes : int
+        количество хэш-функций
+    bits : bytearray
+        битовый массив
+
+    >>> bloom = BloomFilter.for_capacity(1000)
+    >>> for i in range(1000):
+    ...     bloom.add(f"город {i}")
+    >>> all(f"город {i}" in bloom for i in range(1000))
+    True
+    >>> sum(f"село {i}" in bloom for i in range(1000)) < 30
+    True
+    """
+
+    def __init__(self, size, hashes, bits=None):
+        """
+        Инициализация обьекта
+        :param size: int
+            количество бит
+        :param hashes: int
+            количество хэш-функций
+        :param bits: bytearray | None
+            готовый битовый массив
+        """
+        self.size = size
+        self.hashes = hashes
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.01):
+        """
+        :param capacity: int
+            ожидаемое количество элементов
+        :param error_rate: float
+            допустимая доля ложноположительных ответов
+        :return: BloomFilter
+        """
+        size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        return cls(size, max(round(size / capacity * math.log(2)), 1))
+
+    def _positions(self, value):
+        """
+        :param value: str
+        :return: Iterator[int]
+            номера бит значения (двойное хэширование, не зависит от PYTHONHASHSEED)
+        """
+        digest = hashlib.blake2b(value.encode("utf_8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        """
+        :param value: str
+            добавляемое значение
+        """
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def to_dict(self):
+        return {"size": self.size, "hashes": self.hashes, "bits": self.bits.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["size"], data["hashes"], bytearray.fromhex(data["bits"]))
+
+
+class PartitionStats:
+    """
+    Статистика одной партиции, накапливаемая по мере записи строк
+
+    Atributes
+    ---------
+    rows : int
+        количество строк
+    year_min, year_max : int | None
+        диапазон годов публикации
+    salary_min, salary_max : float | None
+        диапазон окладов (по всем столбцам окладов)
+    areas : set[str]
+        регионы в нижнем регистре
+    """
+
+    def __init__(self):
+        """
+        Инициализация обьекта
+        """
+        self.rows = 0
+        self.year_min = self.year_max = None
+        self.salary_min = self.salary_max = None
+        self.areas = set()
+
+    def add(self, df, salary_columns):
+        """
+        Учитывает строки партиции
+        :param df: DataFrame
+            строки со столбцами published_at и area_name
+        :param salary_columns: str[]
+            столбцы окладов
+        """
+        self.rows += len(df)
+        if not len(df):
+            return
+        years = Timestamps(df["published_at"]).year
+        self.year_min = _min(self.year_min, int(years.min()))
+        self.year_max = _max(self.year_max, int(years.max()))
+        for column in salary_columns:
+            salary = df[column].dropna()
+            if len(salary):
+                self.salary_min = _min(self.salary_min, float(salary.min()))
+                self.salary_max = _max(self.salary_max, float(salary.max()))
+        if "area_name" in df:
+            self.areas.update(df["area_name"].dropna().str.lower().unique())
+
+    def to_dict(self, path):
+        """
+        :param path: str
+            путь к файлу партиции
+        :return: dict
+            запись манифеста
+        """
+        stat = os.stat(path)
+        entry = {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                 "rows": self.rows, "year_min": self.year_min, "year_max": self.year_max,
+                 "salary_min": self.salary_min, "salary_max": self.salary_max}
+        if len(self.areas) <= MAX_LISTED_AREAS:
+            entry["areas"] = sorted(self.areas)
+        else:
+            bloom = BloomFilter.for_capacity(len(self.areas))
+            for area in self.areas:
+                bloom.add(area)
+            entry["areas_bloom"] = bloom.to_dict()
+        return entry
+
+
+def _min(current, value):
+    return value if current is None else min(current, value)
+
+
+def _max(current, value):
+    return value if current is None else max(current, value)
+
+
+def write_manifest(out_dir, stats):
+    """
+    Записывает манифест партиций
+    :param out_dir: str
+        папка с партициями
+    :param stats: dict[str, PartitionStats]
+        путь к файлу партиции - её статистика
+    """
+    partitions = [stats[path].to_dict(path) for path in sorted(stats)]
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf_8") as file:
+        json.dump({"partitions": partitions}, file, ensure_ascii=False, indent=1)
+
+
+def load_manifest(out_dir):
+    """
+    :param out_dir: str
+        папка с партициями
+    :return: dict | None
+        манифест или None, если его нет
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf_8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _may_match(entry, path, years, area_name, salary_range):
+    """
+    Проверяет по записи манифеста, могут ли в партиции быть нужные строки
+    :return: bool
+        False - партицию точно можно пропустить
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+        return True
+    if entry["rows"] == 0:
+        return False
+    if years is not None and (entry["year_max"] < years[0] or entry["year_min"] > years[1]):
+        return False
+    if salary_range is not None and entry["salary_min"] is not None \
+            and (entry["salary_max"] < salary_range[0] or entry["salary_min"] > salary_range[1]):
+        return False
+    if area_name is not None:
+        area_name = area_name.lower()
+        if "areas" in entry:
+            return area_name in entry["areas"]
+        return area_name in BloomFilter.from_dict(entry["areas_bloom"])
+    return True
+
+
+def select_partitions(out_dir, years=None, area_name=None, salary_range=None):
+    """
+    Выбирает партиции, в которых могут быть строки с нужными годами, регионом и окладом
+
+    Рассматриваются только файлы партиций (part_ГГГГ.csv, part_ГГГГ.parquet). Партиции, которых нет в манифесте
+    (записанные после него или при его отсутствии), и партиции, изменённые после записи манифеста,
+    не отбрасываются.
+    :param out_dir: str
+        папка с партициями
+    :param years: (int, int) | None
+        диапазон годов включительно
+    :param area_name: str | None
+        регион (без учёта регистра)
+    :param salary_range: (float, float) | None
+        диапазон окладов включительно
+    :return: str[]
+        пути к файлам партиций
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as out_dir:
+    ...     for name in ("part_2020.csv", "part_2021.csv", "notes.csv"):
+    ...         _ = open(os.path.join(out_dir, name), "w").write("published_at\\n")
+    ...     stats = PartitionStats()
+    ...     stats.rows, stats.year_min, stats.year_max = 1, 2020, 2020
+    ...     write_manifest(out_dir, {os.path.join(out_dir, "part_2020.csv"): stats})
+    ...     [os.path.basename(path) for path in select_partitions(out_dir, years=(2021, 2022))]
+    ['part_2021.csv']
+    """
+    manifest = load_manifest(out_dir)
+    entries = {} if manifest is None else dict((entry["file"], entry) for entry in manifest["partitions"])
+    paths = [os.path.join(out_dir, name) for name in sorted(os.listdir(out_dir)) if PARTITION_NAME.fullmatch(name)]
+    return [path for path in paths if os.path.basename(path) not in entries
+            or _may_match(entries[os.path.basename(path)], path, years, area_name, salary_range)]
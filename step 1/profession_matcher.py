@@ -0,0 +1,79 @@
+from collections import deque
+
+
+class ProfessionMatcher:
+    """
+    Поиск сразу нескольких профессий в названии вакансии (автомат Ахо-Корасик)
+
+    Проверка одного названия выполняется за один проход по его символам независимо от количества профессий.
+    Профессия считается найденной, если она входит в название как подстрока (как `profession in name`).
+
+    Atributes
+    ---------
+    professions : str[]
+        искомые профессии
+    _goto : dict[str, int][]
+        переходы автомата
+    _fail : int[]
+        суффиксные ссылки
+    _output : tuple[int][]
+        номера профессий, оканчивающихся в состоянии (с учётом суффиксных ссылок)
+
+    >>> matcher = ProfessionMatcher(["аналитик", "программист", "Python", "ист"])
+    >>> matcher.match("Ведущий программист Python")
+    (1, 2, 3)
+    >>> matcher.match("Бизнес-аналитик")
+    (0,)
+    >>> matcher.match("Менеджер")
+    ()
+    """
+
+    def __init__(self, professions):
+        """
+        Инициализация обьекта, построение автомата
+        :param professions: str[]
+            искомые профессии
+        """
+        self.professions = list(professions)
+        self._goto = [{}]
+        outputs = [set()]
+        for index, profession in enumerate(self.professions):
+            state = 0
+            for char in profession:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    outputs.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            outputs[state].add(index)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                outputs[next_state] |= outputs[self._fail[next_state]]
+        self._output = [tuple(sorted(output)) for output in outputs]
+
+    def match(self, name):
+        """
+        :param name: str
+            название вакансии
+        :return: tuple[int]
+            номера профессий (по возрастанию), входящих в название
+        """
+        found = set(self._output[0])
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in name:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return tuple(sorted(found))
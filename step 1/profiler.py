@@ -0,0 +1,186 @@
+import atexit
+import json
+import os
+import time
+import tracemalloc
+
+# Имя файла профиля: при заданной переменной окружения профилирование включается при импорте модуля.
+# "1" - профиль пишется в profile.json, файл с расширением .folded - в формате flame graph (flamegraph.pl, speedscope)
+PROFILE_ENV = "VACANCY_PROFILE"
+# "0" - не отслеживать память (tracemalloc замедляет код, создающий много обьектов)
+PROFILE_MEMORY_ENV = "VACANCY_PROFILE_MEMORY"
+
+_enabled = False
+_output = None
+_stack = []
+# путь этапа ("statistic;parse") -> [вызовы, время, собственное время, строки, пик памяти]
+_records = {}
+
+
+class _Stage:
+    """
+    Замер одного этапа
+
+    Atributes
+    ---------
+    name : str
+        название этапа
+    rows : int | None
+        количество обработанных строк (можно задать внутри блока with)
+    """
+    __slots__ = ("name", "rows", "_start", "_children", "_memory", "_peak")
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._children = 0.0
+        self._peak = 0
+        if tracemalloc.is_tracing():
+            self._memory, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                # счётчик пика tracemalloc общий, поэтому перед сбросом пик внешнего этапа сохраняется в нём
+                _stack[-1]._peak = max(_stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+        _stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._start
+        path = ";".join(stage.name for stage in _stack)
+        _stack.pop()
+        peak = 0
+        if tracemalloc.is_tracing():
+            peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if _stack:
+                _stack[-1]._peak = max(_stack[-1]._peak, peak)
+            peak -= self._memory
+        if _stack:
+            _stack[-1]._children += seconds
+
+        record = _records.setdefault(path, [0, 0.0, 0.0, None, 0])
+        record[0] += 1
+        record[1] += seconds
+        record[2] += seconds - self._children
+        if self.rows is not None:
+            record[3] = (record[3] or 0) + self.rows
+        record[4] = max(record[4], peak)
+        return False
+
+
+class _NullStage:
+    """
+    Этап при выключенном профилировании: ничего не замеряет
+    """
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, key, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, rows=None):
+    """
+    Блок with, замеряющий этап: время, количество строк и пик памяти (tracemalloc)
+
+    Этапы могут быть вложенными, путь этапа состоит из названий всех внешних этапов.
+    При выключенном профилировании возвращает пустой блок.
+    :param name: str
+        название этапа (read, parse, clean, convert, aggregate, render chart, render pdf)
+    :param rows: int | None
+        количество обрабатываемых строк, если оно известно заранее
+
+    >>> enable(memory=False)
+    >>> with stage("statistic"):
+    ...     with stage("read") as current:
+    ...         current.rows = 10
+    ...     with stage("read", rows=5):
+    ...         pass
+    >>> [(record["path"], record["calls"], record["rows"]) for record in report()]
+    [('statistic', 1, None), ('statistic;read', 2, 15)]
+    >>> disable()
+    >>> with stage("read") as current:
+    ...     current.rows = 1
+    >>> report()
+    []
+    """
+    return _Stage(name, rows) if _enabled else _NULL_STAGE
+
+
+def enable(output=None, memory=True):
+    """
+    Включает профилирование
+    :param output: str | None
+        файл, в который профиль запишется при завершении программы (None - не записывать)
+    :param memory: bool
+        отслеживать пик памяти этапов
+    """
+    global _enabled, _output
+    _enabled = True
+    if output is not None and _output is None:
+        atexit.register(_dump_at_exit)
+    _output = output
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """
+    Выключает профилирование и очищает собранные замеры
+    """
+    global _enabled, _output
+    _enabled = False
+    _output = None
+    _records.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _enabled
+
+
+def report():
+    """
+    :return: dict[]
+        замеры этапов: путь, количество вызовов, время, собственное время (без вложенных этапов), строки,
+        строк в секунду и пик памяти в байтах
+    """
+    return [{"path": path, "calls": calls, "seconds": round(seconds, 6), "self_seconds": round(own, 6),
+             "rows": rows, "rows_per_sec": round(rows / seconds) if rows and seconds else None, "peak_bytes": peak}
+            for path, (calls, seconds, own, rows, peak) in sorted(_records.items())]
+
+
+def dump(file_name):
+    """
+    Записывает профиль: .folded - свёрнутые стеки для flame graph (собственное время в микросекундах),
+    иначе - json
+    :param file_name: str
+        имя/полный путь файла
+    """
+    with open(file_name, "w", encoding="utf_8") as file:
+        if file_name.endswith(".folded"):
+            for record in report():
+                file.write(f"{record['path']} {round(record['self_seconds'] * 1e6)}\n")
+        else:
+            json.dump({"stages": report()}, file, ensure_ascii=False, indent=1)
+
+
+def _dump_at_exit():
+    if _output is not None and _records:
+        dump(_output)
+
+
+if os.environ.get(PROFILE_ENV):
+    enable("profile.json" if os.environ[PROFILE_ENV] == "1" else os.environ[PROFILE_ENV],
+           os.environ.get(PROFILE_MEMORY_ENV) != "0")
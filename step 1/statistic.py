@@ -1,29 +1,72 @@
 import csv
 import datetime
+import hashlib
+import heapq
+import io
+import json
+from itertools import islice
+import os
 import re
 import matplotlib.pyplot as plt
+import numpy as np
 import pdfkit
 from matplotlib.ticker import IndexLocator
 from jinja2 import Environment, FileSystemLoader
+import csv_cache
+from executor import Executor
+import profiler
+from currency_rates import CurrencyRates
+from profession_matcher import ProfessionMatcher
+from timestamps import Timestamps, date_number, format_date
+from vacancy_store import VacancyStore, VacancyView
+
+# Строк в пачке потокового режима: даты пачки разбираются одним векторным проходом
+VACANCY_BATCH = 10000
+# Кавычка и переводы строки: перевод строки вне кавычек заканчивает запись csv
+RECORD_DELIMITERS = re.compile(rb'"|\r\n?|\n')
 
 
 class DictByCity:
     """
     Словарь для формирования статистики по городам
+
+    При заданном max_counters работает как скетч Space-Saving: хранится не больше max_counters городов,
+    новый город вытесняет город с наименьшим счётчиком и наследует его счётчик как погрешность.
+    Гарантии для N вакансий и k = max_counters:
+        - оценка кол-ва вакансий города завышена не больше чем на N / k (погрешность хранится в errors);
+        - любой город, у которого больше N / k вакансий, присутствует в словаре,
+          поэтому при k >= 100 не теряется ни один город с долей от 1%;
+        - средний оклад считается по вакансиям, учтённым после последнего попадания города в словарь.
+
     Atributes
     ---------
     data_dict : dict[str, [int, int]]
         данные словаря: [город, [суммарный оклад, кол-во вакансий]]
     total_count : int
         всего вакансий
+    max_counters : int | None
+        максимальное количество хранимых городов (None - точный подсчёт)
+    errors : dict[str, int]
+        погрешность кол-ва вакансий для городов, попавших в словарь вытеснением
+
+    >>> t = DictByCity(max_counters=2)
+    >>> for city in ["A", "A", "A", "B", "C", "A"]:
+    ...     t.add_data(city, 100)
+    >>> t.data_dict, t.errors, t.total_count
+    ({'A': [400, 4], 'C': [100, 2]}, {'C': 1}, 6)
     """
 
-    def __init__(self):
+    def __init__(self, max_counters=None):
         """
         Инициализация обьекта
+        :param max_counters: int | None
+            максимальное количество хранимых городов (None - точный подсчёт)
         """
         self.data_dict = {}
         self.total_count = 0
+        self.max_counters = max_counters
+        self.errors = {}
+        self._heap = []
 
     def add_data(self, city, value):
         """
@@ -34,12 +77,144 @@ class DictByCity:
             средний оклад
         """
         if city not in self.data_dict.keys():
-            self.data_dict[city] = [value, 1]
+            error = 0
+            if self.max_counters is not None and len(self.data_dict) >= self.max_counters:
+                error = self._evict_min()
+                self.errors[city] = error
+            self.data_dict[city] = [value, error + 1]
+            if self.max_counters is not None:
+                heapq.heappush(self._heap, (error + 1, city))
         else:
             self.data_dict[city][0] += value
             self.data_dict[city][1] += 1
         self.total_count += 1
 
+    def add_groups(self, cities, values, counts):
+        """
+        Добавляет уже сгруппированные данные, например, суммы по кодам городов колоночного хранилища.
+        Для точного подсчёта результат совпадает с add_data для каждой вакансии
+        :param cities: str[]
+            города
+        :param values: float[]
+            суммарный оклад вакансий каждого города
+        :param counts: int[]
+            кол-во вакансий каждого города (города без вакансий пропускаются)
+
+        >>> t = DictByCity()
+        >>> t.add_data("Пермь", 50)
+        >>> t.add_groups(["Москва", "Пермь", "Омск"], [400, 100, 0], [2, 1, 0])
+        >>> t.data_dict, t.total_count
+        ({'Пермь': [150, 2], 'Москва': [400, 2]}, 4)
+        """
+        other = DictByCity()
+        other.data_dict = dict((city, [value, count]) for city, value, count in zip(cities, values, counts) if count)
+        other.total_count = sum(counts)
+        self.merge(other)
+
+    def _evict_min(self):
+        """
+        Удаляет из словаря город с наименьшим кол-вом вакансий
+
+        Куча хранит по одной записи на город, счётчик в записи может отставать от текущего:
+        такие записи обновляются при извлечении.
+        :return: int
+            кол-во вакансий удалённого города
+        """
+        while True:
+            count, city = heapq.heappop(self._heap)
+            current = self.data_dict[city][1]
+            if current == count:
+                del self.data_dict[city]
+                self.errors.pop(city, None)
+                return count
+            heapq.heappush(self._heap, (current, city))
+
+    def _average(self, value):
+        """
+        :param value: (str, [int, int])
+            город и его данные
+        :return: int | float
+            средний оклад по вакансиям, учтённым в сумме
+        """
+        city, (salary, count) = value
+        return salary // (count - self.errors.get(city, 0))
+
+    def merge(self, other):
+        """
+        Добавляет к словарю данные другого словаря (например, частичный результат другого процесса)
+        :param other: DictByCity
+            словарь для слияния
+
+        >>> t, other = DictByCity(), DictByCity()
+        >>> t.add_data("Москва", 100); other.add_data("Пермь", 50); other.add_data("Москва", 300)
+        >>> t.merge(other)
+        >>> t.data_dict, t.total_count
+        ({'Москва': [400, 2], 'Пермь': [50, 1]}, 3)
+        """
+        for city, (value, count) in other.data_dict.items():
+            if city not in self.data_dict:
+                self.data_dict[city] = [value, count]
+                if city in other.errors:
+                    self.errors[city] = other.errors[city]
+            else:
+                self.data_dict[city][0] += value
+                self.data_dict[city][1] += count
+                self.errors[city] = self.errors.get(city, 0) + other.errors.get(city, 0)
+                if not self.errors[city]:
+                    del self.errors[city]
+        self.total_count += other.total_count
+        if self.max_counters is not None:
+            self._trim()
+
+    def _trim(self):
+        """
+        Оставляет в скетче max_counters городов с наибольшим кол-вом вакансий (после слияния)
+        """
+        keep = set(heapq.nlargest(self.max_counters, self.data_dict, key=lambda c: self.data_dict[c][1]))
+        self.data_dict = dict((c, v) for c, v in self.data_dict.items() if c in keep)
+        self.errors = dict((c, e) for c, e in self.errors.items() if c in keep)
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        """
+        Заново строит кучу счётчиков скетча по текущему словарю
+        """
+        self._heap = [(v[1], c) for c, v in self.data_dict.items()]
+        heapq.heapify(self._heap)
+
+    def get_state(self):
+        """
+        :return: dict
+            состояние словаря для сохранения в json: данные, кол-во вакансий, размер и погрешности скетча
+        """
+        return {'data_dict': self.data_dict, 'total_count': self.total_count,
+                'max_counters': self.max_counters, 'errors': self.errors}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Восстанавливает словарь из состояния get_state (вместе с кучей скетча)
+        :param state: dict
+            сохранённое состояние
+        :return: DictByCity
+
+        >>> t = DictByCity(max_counters=2)
+        >>> for city in ["A", "A", "B", "C"]:
+        ...     t.add_data(city, 100)
+        >>> restored = DictByCity.from_state(json.loads(json.dumps(t.get_state())))
+        >>> for other in (t, restored):
+        ...     other.add_data("D", 100)
+        >>> restored.get_state() == t.get_state()
+        True
+        """
+        result = cls(state['max_counters'])
+        result.data_dict = dict((city, list(value)) for city, value in state['data_dict'].items())
+        result.total_count = state['total_count']
+        result.errors = dict(state['errors'])
+        if result.max_counters is not None:
+            result._rebuild_heap()
+        return result
+
     def get_by_salary(self):
         """
         :return: dict[str, int]
@@ -67,16 +242,15 @@ class DictByCity:
         {}
 
         """
-        sub_dict = {}
-        sort_dic = dict(sorted(self.data_dict.items(), key=lambda item: item[1][0] // item[1][1], reverse=True))
-        for key, value in sort_dic.items():
-            ratio = value[1] / self.total_count
-            if ratio >= 0.01:
-                sub_dict[key] = int(value[0] // value[1])
-            if len(sub_dict) == 10:
-                break
+        top = heapq.nlargest(10, self._frequent_cities(), key=self._average)
+        return dict((key, int(self._average((key, value)))) for key, value in top)
 
-        return sub_dict
+    def _frequent_cities(self):
+        """
+        :return: Iterator[(str, [int, int])]
+            города с долей вакансий не меньше 1%
+        """
+        return ((key, value) for key, value in self.data_dict.items() if value[1] / self.total_count >= 0.01)
 
     def get_by_count(self):
         """
@@ -103,18 +277,11 @@ class DictByCity:
         >>> t.get_by_count()
         {}
         """
-        sub_dict = {}
-        sort_dic = dict(sorted(self.data_dict.items(), key=lambda item: item[1][1], reverse=True))
-        count_top_city = 0
-        for key, value in sort_dic.items():
-            ratio = value[1] / self.total_count
-            if ratio >= 0.01:
-                sub_dict[key] = round(ratio, 4)
-                count_top_city += value[1]
-            if len(sub_dict) == 10:
-                other_ratio = 1 - count_top_city / self.total_count
-                sub_dict["Другие"] = round(other_ratio, 4)
-                break
+        top = heapq.nlargest(10, self._frequent_cities(), key=lambda item: item[1][1])
+        sub_dict = dict((key, round(value[1] / self.total_count, 4)) for key, value in top)
+        if len(sub_dict) == 10:
+            count_top_city = sum(value[1] for key, value in top)
+            sub_dict["Другие"] = round(1 - count_top_city / self.total_count, 4)
         return sub_dict
 
 
@@ -149,6 +316,21 @@ class DictByYear:
             self.data_dict[year][0] += value
             self.data_dict[year][1] += count
 
+    def merge(self, other):
+        """
+        Добавляет к словарю данные другого словаря (например, частичный результат другого процесса)
+        :param other: DictByYear
+            словарь для слияния
+
+        >>> t, other = DictByYear(), DictByYear()
+        >>> t.add_data(2007, 100, 1); other.add_data(2008, 0, 0); other.add_data(2007, 300, 1)
+        >>> t.merge(other)
+        >>> t.data_dict
+        {2007: [400, 2], 2008: [0, 0]}
+        """
+        for year, (value, count) in other.data_dict.items():
+            self.add_data(year, value, count)
+
     def get_by_salary(self):
         """
         :return: dict[int, int]
@@ -203,6 +385,52 @@ class DictByYear:
         return sub_dict
 
 
+class FileRange(io.RawIOBase):
+    """
+    Байтовый диапазон открытого файла в виде потока: чтение останавливается на конце диапазона,
+    поэтому поверх него можно построить io.TextIOWrapper и читать диапазон построчно, не загружая целиком
+
+    Atributes
+    ---------
+    file : BinaryIO
+        файл, открытый в двоичном режиме и установленный на начало диапазона
+    left : int
+        сколько байтов диапазона осталось прочитать
+
+    >>> source = io.BytesIO(b'a,b\\n1,2\\n3,4\\n')
+    >>> _ = source.seek(4)
+    >>> io.TextIOWrapper(io.BufferedReader(FileRange(source, 8)), encoding='utf_8').read()
+    '1,2\\n'
+    """
+
+    def __init__(self, file, end):
+        """
+        Инициализация обьекта
+        :param file: BinaryIO
+            файл, установленный на начало диапазона
+        :param end: int
+            байтовое смещение конца диапазона
+        """
+        super().__init__()
+        self.file = file
+        self.left = max(end - file.tell(), 0)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """
+        Читает в буфер не больше, чем осталось до конца диапазона
+        :param buffer: bytearray | memoryview
+            буфер для чтения
+        :return: int
+            количество прочитанных байтов (0 - конец диапазона)
+        """
+        size = self.file.readinto(memoryview(buffer)[:min(len(buffer), self.left)])
+        self.left -= size
+        return size
+
+
 class DataSet:
     """
     Класс для хранения данных и их статистической обработке
@@ -211,64 +439,176 @@ class DataSet:
     ---------
     file_name : str
         имя/полный путь файла
-    vacancies_objects : Vacancy[]
-        массив вакансий
+    streaming : bool
+        потоковый режим обработки файла
+    vacancies : VacancyStore
+        колоночное хранилище вакансий (пустое в потоковом режиме)
+    vacancies_objects : VacancyView
+        ленивое представление хранилища в виде массива вакансий
     salary_count_by_year : DictByYear
         зарплата и кол-во вакансий по годам
     job_salary_count_by_year : DictByYear
         зарплата и кол-во вакансий по годам для выбранной профессии
+    job_salary_count_by_profession : dict[str, DictByYear]
+        зарплата и кол-во вакансий по годам для каждой профессии пакетного режима
     salary_count_by_city : DictByCity
         зарплата и кол-во вакансий по городам
     """
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, streaming=False, max_cities=None, use_cache=False):
         """
         Инициализация обьекта
         :param file_name: str
             имя/полный путь файла
+        :param streaming: bool
+            потоковый режим: вакансии не хранятся в памяти, а считываются из файла во время сбора статистики
+        :param max_cities: int | None
+            ограничение памяти статистики по городам (см. DictByCity), None - точный подсчёт
+        :param use_cache: bool
+            хранить колонки вакансий в двоичном кэше (csv_cache): первый запуск сохраняет их,
+            следующие открывают кэш через mmap без разбора csv (не используется в потоковом режиме)
         """
         self.file_name = file_name
-        self.vacancies_objects = DataSet._set_vacancies(*DataSet._csv_reader(file_name))
+        self.streaming = streaming
+        if streaming:
+            self.vacancies = VacancyStore()
+        elif use_cache:
+            with profiler.stage('read') as current:
+                self.vacancies = DataSet._load_store(file_name)
+                current.rows = len(self.vacancies)
+        else:
+            # разбор csv и перевод окладов в рубли выполняются за один проход
+            with profiler.stage('parse') as current:
+                self.vacancies = DataSet._set_store(*DataSet._split_header(DataSet._iter_rows(file_name)))
+                current.rows = len(self.vacancies)
 
         self.salary_count_by_year = DictByYear()
         self.job_salary_count_by_year = DictByYear()
-        self.salary_count_by_city = DictByCity()
+        self.job_salary_count_by_profession = {}
+        self.salary_count_by_city = DictByCity(max_cities)
 
     @staticmethod
-    def _csv_reader(file_name):
+    def _iter_rows(file_name):
         """
-        Считывает данные с csv файла
+        Построчно считывает csv файл, пропуская строки с пустыми полями
         :param file_name: str
             имя/полный путь файла
-        :return: (str[], str[])
+        :return: Iterator[str[]]
+            строки файла (первая строка - заглавия)
+        """
+        with open(file_name, encoding='utf_8_sig') as file:
+            for row in csv.reader(file):
+                if row and row.count('') == 0:
+                    yield row
+
+    @staticmethod
+    def _split_header(rows):
+        """
+        Отделяет заглавия от остальных строк
+        :param rows: Iterator[str[]]
+            строки файла
+        :return: (str[], Iterator[str[]])
             заглавия(параметры), значения(сами вакансии)
         """
-        file_csv = csv.reader(open(file_name, encoding='utf_8_sig'))
-        list_data = [x for x in file_csv if x.count('') == 0]
+        return next(rows, None), rows
 
-        return list_data[0], list_data[1:]
+    @staticmethod
+    def _field_indexes(headers):
+        """
+        :param headers: str[]
+            заглавия
+        :return: int[]
+            номера столбцов: название, нижняя и верхняя граница оклада, валюта, регион, дата публикации
+        """
+        return [headers.index(field) for field in
+                ('name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at')]
+
+    @staticmethod
+    def _iter_vacancies(headers, vacancies):
+        """
+        Лениво создаёт вакансии из строк файла. Строки читаются пачками по VACANCY_BATCH, даты публикации
+        пачки разбираются сразу (timestamps.Timestamps)
+        :param headers: str[]
+            заглавия
+        :param vacancies: Iterable[str[]]
+            вакансии
+        :return: Iterator[Vacancy]
+        """
+        if headers is None:
+            return
+        i_name, i_from, i_to, i_currency, i_area, i_date = DataSet._field_indexes(headers)
+        vacancies = iter(vacancies)
+        for batch in iter(lambda: list(islice(vacancies, VACANCY_BATCH)), []):
+            dates = Timestamps([vac[i_date] for vac in batch]).date.tolist()
+            for vac, date in zip(batch, dates):
+                yield Vacancy(vac[i_name], vac[i_from], vac[i_to], vac[i_currency], vac[i_area], vac[i_date], date)
 
     @staticmethod
-    def _set_vacancies(headers, vacancies):
+    def _set_store(headers, vacancies):
         """
-        Создаёт массив вакансий
+        Заполняет колоночное хранилище, не создавая обьектов вакансий. Даты публикации собираются
+        в список и разбираются одним векторным проходом после чтения (timestamps.Timestamps)
         :param headers: str[]
             заглавия
-        :param vacancies: str[]
+        :param vacancies: Iterable[str[]]
             вакансии
-        :return: Vacancy[]
-            массив вакансий
+        :return: VacancyStore
+            хранилище вакансий
         """
-        list_vacancies = []
+        store = VacancyStore()
+        if headers is None:
+            return store
+        i_name, i_from, i_to, i_currency, i_area, i_date = DataSet._field_indexes(headers)
+        dates = []
         for vac in vacancies:
-            dic = {}
-            for i, item in enumerate(headers):
-                dic[item] = vac[i]
-            list_vacancies.append(
-                Vacancy(dic['name'], dic['salary_from'], dic['salary_to'], dic['salary_currency'], dic['area_name'],
-                        dic['published_at']))
+            date = vac[i_date]
+            dates.append(date)
+            store.append(vac[i_name], Vacancy.get_average_salary(vac[i_from], vac[i_to], vac[i_currency], date),
+                         vac[i_area], 0)
+        store.set_dates(Timestamps(dates).date)
+        return store
 
-        return list_vacancies
+    @staticmethod
+    def _cache_tag():
+        """
+        :return: str
+            метка кэша колонок (оклады в кэше уже переведены в рубли, поэтому зависят от курсов)
+        """
+        return 'statistic-' + CurrencyRates.get_default().fingerprint
+
+    @staticmethod
+    def has_cache(file_name):
+        """
+        Проверяет, сохранён ли актуальный кэш колонок файла (см. use_cache)
+        :param file_name: str
+            имя/полный путь файла
+        :return: bool
+        """
+        return csv_cache.exists(file_name, DataSet._cache_tag())
+
+    @staticmethod
+    def _load_store(file_name):
+        """
+        Открывает хранилище из кэша, а при его отсутствии - разбирает файл и сохраняет кэш
+        :param file_name: str
+            имя/полный путь файла
+        :return: VacancyStore
+        """
+        tag = DataSet._cache_tag()
+        columns = csv_cache.load(file_name, tag, decode=False)
+        if columns is not None:
+            return VacancyStore.from_columns(columns)
+        store = DataSet._set_store(*DataSet._split_header(DataSet._iter_rows(file_name)))
+        csv_cache.save(file_name, tag, store.to_columns())
+        return store
+
+    @property
+    def vacancies_objects(self):
+        """
+        :return: VacancyView
+            вакансии хранилища, создаваемые по требованию
+        """
+        return VacancyView(self.vacancies, Vacancy.from_values)
 
     def collect_statistic(self, profession):
         """
@@ -285,13 +625,435 @@ class DataSet:
         >>> t.salary_count_by_city.data_dict
         {'Санкт-Петербург': [224000.0, 6], 'Москва': [1594150.0, 31], 'Саратов': [7500.0, 1], 'Екатеринбург': [175000.0, 4], 'Новосибирск': [45000.0, 1], 'Другие регионы': [60000.0, 1], 'Зеленоград': [80000.0, 1], 'Верхне-Приволжский округ': [18000.0, 1], 'Раменское': [55000.0, 1], 'Воронеж': [20000.0, 1], 'Пермь': [169000.0, 3], 'Ярославль': [17500.0, 1], 'Ижевск': [20000.0, 1], 'Владивосток': [60000.0, 1], 'Курган': [14000.0, 1], 'Томск': [27500.0, 1]}
         """
-        for vac in self.vacancies_objects:
-            self.salary_count_by_year.add_data(vac.published_at.year, vac.average_salary, 1)
-            if profession in vac.name:
-                self.job_salary_count_by_year.add_data(vac.published_at.year, vac.average_salary, 1)
+        with profiler.stage('aggregate') as current:
+            if self.streaming:
+                count = 0
+                vacancies = DataSet._iter_vacancies(*DataSet._split_header(DataSet._iter_rows(self.file_name)))
+                for count, vac in enumerate(vacancies, 1):
+                    self._add_vacancy(vac, profession)
+                current.rows = count
+                return
+
+            store = self.vacancies
+            current.rows = len(store)
+            matches = [profession in name for name in store.names]
+            for name_code, date, salary in zip(store.name_codes, store.dates, store.salaries):
+                year = date // 10000
+                self.salary_count_by_year.add_data(year, salary, 1)
+                if matches[name_code]:
+                    self.job_salary_count_by_year.add_data(year, salary, 1)
+                else:
+                    self.job_salary_count_by_year.add_data(year, 0, 0)
+            self._add_cities(store)
+
+    def _add_cities(self, store):
+        """
+        Учитывает вакансии хранилища в статистике по городам. При точном подсчёте вакансии группируются
+        по целочисленным кодам регионов (np.bincount складывает оклады в порядке вакансий, поэтому суммы
+        совпадают с поштучным add_data), скетч заполняется поштучно
+        :param store: VacancyStore
+            хранилище вакансий
+        """
+        if self.salary_count_by_city.max_counters is not None:
+            areas = store.areas
+            for area_code, salary in zip(store.area_codes, store.salaries):
+                self.salary_count_by_city.add_data(areas[area_code], salary)
+            return
+        codes = np.asarray(store.area_codes, dtype=np.int64)
+        salaries = np.asarray(store.salaries, dtype=float)
+        self.salary_count_by_city.add_groups(store.areas,
+                                             np.bincount(codes, salaries, len(store.areas)).tolist(),
+                                             np.bincount(codes, minlength=len(store.areas)).tolist())
+
+    def collect_statistic_parallel(self, profession, processes=None):
+        """
+        Формирует статистику несколькими процессами
+
+        Файл делится на байтовые диапазоны по границам записей csv (с учётом переводов строки внутри полей
+        в кавычках), каждый процесс собирает по своему диапазону частичные DictByYear/DictByCity, которые затем
+        в порядке диапазонов сливаются в итоговые. Учитываются те же вакансии, что и в collect_statistic,
+        но суммы окладов складываются по диапазонам, а не подряд.
+        :param profession: str
+            навзвание профессии
+        :param processes: int | None
+            количество процессов (по умолчанию - количество ядер)
+        """
+        processes = processes or os.cpu_count() or 1
+        headers, header_end = DataSet._read_header(self.file_name)
+        if headers is None:
+            return
+        bounds = DataSet._split_file(self.file_name, header_end, processes * 4)
+        tasks = [(self.file_name, start, end, headers, profession) for start, end in zip(bounds, bounds[1:])]
+        partials = Executor("process", processes).starmap(DataSet._collect_range, tasks)
+
+        for by_year, job_by_year, by_city in partials:
+            self.salary_count_by_year.merge(by_year)
+            self.job_salary_count_by_year.merge(job_by_year)
+            self.salary_count_by_city.merge(by_city)
+
+    @staticmethod
+    def _read_header(file_name):
+        """
+        Считывает заглавия файла
+        :param file_name: str
+            имя/полный путь файла
+        :return: (str[] | None, int)
+            заглавия и байтовое смещение начала первой вакансии
+        """
+        with open(file_name, 'rb') as file:
+            end = DataSet._record_starts(file, 0, [1])[0]
+        with open(file_name, encoding='utf_8_sig', newline='') as file:
+            headers = next(csv.reader(file), None)
+        return headers, end
+
+    @staticmethod
+    def _record_starts(file, start, targets, block=1 << 20):
+        """
+        Ищет начала записей csv. Перевод строки заканчивает запись, только если до него чётное количество кавычек
+        (внутри поля в кавычках он - часть значения), поэтому кавычки считаются от начала записи start.
+        Блоки, в которых нет искомых смещений, только пересчитывают кавычки
+        :param file: BinaryIO
+            файл, открытый в двоичном режиме
+        :param start: int
+            байтовое смещение начала записи
+        :param targets: Iterable[int]
+            возрастающие байтовые смещения не меньше start
+        :return: int[]
+            для каждого смещения - начало первой записи не раньше него (или конец файла)
+
+        >>> data = b'a,b\\n"1\\n2",x\\r\\n3,"y\\r\\n""z"" w"\\n4,w'
+        >>> DataSet._record_starts(io.BytesIO(data), 0, [1, 5, 15, len(data)])
+        [4, 13, 28, 31]
+        """
+        size = file.seek(0, os.SEEK_END)
+        result = []
+        targets = iter(targets)
+        target = next(targets, None)
+        file.seek(start)
+        position = start
+        quoted = False
+        while target is not None:
+            chunk = file.read(block)
+            if not chunk:
+                break
+            end = position + len(chunk)
+            if end < target:
+                quoted ^= chunk.count(b'"') % 2 == 1
             else:
-                self.job_salary_count_by_year.add_data(vac.published_at.year, 0, 0)
-            self.salary_count_by_city.add_data(vac.area_name, vac.average_salary)
+                for match in RECORD_DELIMITERS.finditer(chunk):
+                    if match.group() == b'"':
+                        quoted = not quoted
+                    elif not quoted:
+                        while target is not None and position + match.end() >= target:
+                            result.append(position + match.end())
+                            target = next(targets, None)
+            position = end
+        if target is not None:
+            result.append(size)
+            result.extend(size for _ in targets)
+        return result
+
+    @staticmethod
+    def _split_file(file_name, start, parts):
+        """
+        Делит файл на байтовые диапазоны, выровненные по границам записей csv
+        :param file_name: str
+            имя/полный путь файла
+        :param start: int
+            начало первого диапазона (начало записи)
+        :param parts: int
+            желаемое количество диапазонов
+        :return: int[]
+            границы диапазонов (начало первого, ..., конец последнего)
+        """
+        size = os.path.getsize(file_name)
+        step = max((size - start) // parts, 1)
+        bounds = [start]
+        with open(file_name, 'rb') as file:
+            for bound in DataSet._record_starts(file, start, range(start + step, size, step)):
+                if bounds[-1] < bound < size:
+                    bounds.append(bound)
+        bounds.append(size)
+        return bounds
+
+    @staticmethod
+    def _collect_range(file_name, start, end, headers, profession):
+        """
+        Собирает частичную статистику по байтовому диапазону файла (выполняется в отдельном процессе)
+        :param file_name: str
+            имя/полный путь файла
+        :param start: int
+            начало диапазона
+        :param end: int
+            конец диапазона
+        :param headers: str[]
+            заглавия
+        :param profession: str
+            навзвание профессии
+        :return: (DictByYear, DictByYear, DictByCity)
+            зарплата и кол-во вакансий по годам, по годам для профессии, по городам
+        """
+        partial = DataSet(file_name, streaming=True)
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            # диапазон читается потоково, память не зависит от его размера
+            text = io.TextIOWrapper(io.BufferedReader(FileRange(file, end)), encoding='utf_8', newline='')
+            rows = (row for row in csv.reader(text) if row and row.count('') == 0)
+            for vac in DataSet._iter_vacancies(headers, rows):
+                partial._add_vacancy(vac, profession)
+        return partial.salary_count_by_year, partial.job_salary_count_by_year, partial.salary_count_by_city
+
+    def collect_statistic_incremental(self, profession, state_file=None, verify=False):
+        """
+        Формирует статистику, обрабатывая только строки, дописанные в файл с прошлого запуска
+
+        Вместе со статистикой в файл состояния сохраняются обработанное байтовое смещение, отпечатки начала файла
+        до него, отпечаток курсов валют и состояние скетча городов. Если начало файла изменилось (или сменились
+        профессия, курсы валют или размер скетча), статистика собирается заново.
+        Начало файла по умолчанию проверяется быстро, по выборочным блокам (см. _samples): правка, не меняющая
+        размер и не задевшая ни один проверяемый блок, не будет замечена. verify=True проверяет все байты цепочечным
+        отпечатком (см. _fingerprint) - дольше, зато точно. Новый отпечаток дописывается к старому, поэтому время
+        запуска без verify зависит только от объёма новых строк.
+        Недописанная последняя строка не обрабатывается до следующего запуска.
+        :param profession: str
+            навзвание профессии
+        :param state_file: str | None
+            файл состояния (по умолчанию - рядом с файлом данных, с суффиксом .state.json)
+        :param verify: bool
+            проверить всё начало файла, а не только выборочные блоки
+        """
+        state_file = state_file or self.file_name + '.state.json'
+        headers, offset = DataSet._read_header(self.file_name)
+        if headers is None:
+            return
+        rates = CurrencyRates.get_default().fingerprint
+        state = DataSet._load_state(state_file)
+        # отпечаток байтов [0, hashed) и границы его звеньев
+        fingerprint, chain, hashed = '', [], 0
+        if state is not None and state.get('profession') == profession and state.get('headers') == headers \
+                and state.get('rates') == rates \
+                and state.get('max_cities', 0) == self.salary_count_by_city.max_counters \
+                and state['offset'] <= os.path.getsize(self.file_name) \
+                and state.get('samples') == DataSet._samples(self.file_name, state['offset']) \
+                and (not verify or state['fingerprint'] == DataSet._chain_fingerprint(self.file_name, state['chain'])):
+            offset = hashed = state['offset']
+            fingerprint, chain = state['fingerprint'], state['chain']
+            for year, value in state['salary_count_by_year'].items():
+                self.salary_count_by_year.add_data(int(year), *value)
+            for year, value in state['job_salary_count_by_year'].items():
+                self.job_salary_count_by_year.add_data(int(year), *value)
+            self.salary_count_by_city = DictByCity.from_state(state['salary_count_by_city'])
+
+        end = DataSet._last_record_end(self.file_name, offset)
+        if end > offset:
+            for this, other in zip((self.salary_count_by_year, self.job_salary_count_by_year,
+                                    self.salary_count_by_city),
+                                   DataSet._collect_range(self.file_name, offset, end, headers, profession)):
+                this.merge(other)
+            offset = end
+        if offset > hashed:
+            fingerprint = DataSet._fingerprint(self.file_name, hashed, offset, fingerprint)
+            chain.append(offset)
+
+        with open(state_file, 'w', encoding='utf_8') as file:
+            json.dump({'profession': profession,
+                       'headers': headers,
+                       'rates': rates,
+                       'max_cities': self.salary_count_by_city.max_counters,
+                       'offset': offset,
+                       'samples': DataSet._samples(self.file_name, offset),
+                       'fingerprint': fingerprint,
+                       'chain': chain,
+                       'salary_count_by_year': self.salary_count_by_year.data_dict,
+                       'job_salary_count_by_year': self.job_salary_count_by_year.data_dict,
+                       'salary_count_by_city': self.salary_count_by_city.get_state()}, file, ensure_ascii=False)
+
+    @staticmethod
+    def _load_state(state_file):
+        """
+        :param state_file: str
+            файл состояния
+        :return: dict | None
+            сохранённое состояние или None, если файла нет или он повреждён
+        """
+        try:
+            with open(state_file, encoding='utf_8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _fingerprint(file_name, start, end, previous='', block=1 << 20):
+        """
+        Звено цепочечного отпечатка: хэш отпечатка предыдущих звеньев и байтов [start, end) (читаются блоками).
+        Отпечаток начала файла дописывается новыми байтами без повторного чтения старых
+        :param file_name: str
+            имя/полный путь файла
+        :param start: int
+            начало звена (конец предыдущего)
+        :param end: int
+            конец звена
+        :param previous: str
+            отпечаток предыдущих звеньев ('' - первое звено)
+        :param block: int
+            размер блока чтения
+        :return: str
+        """
+        digest = hashlib.sha1(f'{previous}:{start}:{end}'.encode())
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            left = end - start
+            while left > 0:
+                chunk = file.read(min(left, block))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                left -= len(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _chain_fingerprint(file_name, chain):
+        """
+        Пересчитывает цепочечный отпечаток по всем байтам до последней границы
+        :param file_name: str
+            имя/полный путь файла
+        :param chain: int[]
+            возрастающие концы звеньев
+        :return: str
+
+        >>> with open('chain.csv', 'wb') as file:
+        ...     _ = file.write(b'a,b\\n1,2\\n3,4\\n')
+        >>> first = DataSet._fingerprint('chain.csv', 0, 8)
+        >>> DataSet._chain_fingerprint('chain.csv', [8, 12]) == DataSet._fingerprint('chain.csv', 8, 12, first)
+        True
+        >>> os.remove('chain.csv')
+        """
+        fingerprint = ''
+        for start, end in zip([0] + chain, chain):
+            fingerprint = DataSet._fingerprint(file_name, start, end, fingerprint)
+        return fingerprint
+
+    @staticmethod
+    def _samples(file_name, offset, count=16, block=4096):
+        """
+        Быстрый отпечаток начала файла: хэш смещения, count блоков, равномерно расставленных до него,
+        и блока прямо перед ним (туда попадает любая правка, сдвигающая строки)
+        :param file_name: str
+            имя/полный путь файла
+        :param offset: int
+            байтовое смещение
+        :param count: int
+            количество равномерно расставленных блоков
+        :param block: int
+            размер блока
+        :return: str
+        """
+        digest = hashlib.sha1(str(offset).encode())
+        with open(file_name, 'rb') as file:
+            for position in [offset * i // count for i in range(count)] + [max(offset - block, 0)]:
+                file.seek(position)
+                digest.update(file.read(min(block, offset - position)))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _last_record_end(file_name, start, block=1 << 20):
+        """
+        Ищет конец последней полностью записанной записи csv после start (перевод строки внутри поля в кавычках
+        запись не заканчивает)
+        :param file_name: str
+            имя/полный путь файла
+        :param start: int
+            байтовое смещение начала записи
+        :param block: int
+            размер блока чтения
+        :return: int
+            байтовое смещение сразу после последней законченной записи (start, если её нет)
+
+        >>> with open('last_record.csv', 'wb') as file:
+        ...     _ = file.write(b'a,b\\n1,"x\\n')
+        >>> DataSet._last_record_end('last_record.csv', 0)
+        4
+        >>> os.remove('last_record.csv')
+        """
+        last = start
+        quoted = False
+        with open(file_name, 'rb') as file:
+            file.seek(start)
+            position = start
+            while True:
+                chunk = file.read(block)
+                if not chunk:
+                    return last
+                if b'"' not in chunk:
+                    if not quoted:
+                        end = max(chunk.rfind(b'\n'), chunk.rfind(b'\r'))
+                        last = position + end + 1 if end != -1 else last
+                else:
+                    for match in RECORD_DELIMITERS.finditer(chunk):
+                        if match.group() == b'"':
+                            quoted = not quoted
+                        elif not quoted:
+                            last = position + match.end()
+                position += len(chunk)
+
+    def collect_statistic_batch(self, professions):
+        """
+        Формирует статистику сразу для нескольких профессий за один проход по вакансиям
+
+        Все профессии ищутся в названии одновременно автоматом Ахо-Корасик (для хранилища - один раз на каждое
+        уникальное название), поэтому стоимость почти не зависит от количества профессий.
+        Результат для каждой профессии совпадает с job_salary_count_by_year после collect_statistic(profession).
+        :param professions: str[]
+            названия профессий
+        """
+        matcher = ProfessionMatcher(professions)
+        by_profession = [DictByYear() for _ in professions]
+        if self.streaming:
+            for vac in DataSet._iter_vacancies(*DataSet._split_header(DataSet._iter_rows(self.file_name))):
+                self.salary_count_by_year.add_data(vac.year, vac.average_salary, 1)
+                for i in matcher.match(vac.name):
+                    by_profession[i].add_data(vac.year, vac.average_salary, 1)
+                self.salary_count_by_city.add_data(vac.area_name, vac.average_salary)
+        else:
+            store = self.vacancies
+            matches = [matcher.match(name) for name in store.names]
+            for name_code, date, salary in zip(store.name_codes, store.dates, store.salaries):
+                year = date // 10000
+                self.salary_count_by_year.add_data(year, salary, 1)
+                for i in matches[name_code]:
+                    by_profession[i].add_data(year, salary, 1)
+            self._add_cities(store)
+
+        for profession, partial in zip(professions, by_profession):
+            job_salary_count_by_year = DictByYear()
+            for year in self.salary_count_by_year.data_dict:
+                job_salary_count_by_year.add_data(year, *partial.data_dict.get(year, [0, 0]))
+            self.job_salary_count_by_profession[profession] = job_salary_count_by_year
+
+    def get_profession_statistic(self):
+        """
+        Выдает статистику пакетного режима по каждой профессии
+
+        :return: dict[str, (dict[int, int], dict[int, int])]
+            профессия - (зп по годам для профессии, вакансии по годам для професии)
+        """
+        return dict((profession, (data.get_by_salary(), data.get_by_count()))
+                    for profession, data in self.job_salary_count_by_profession.items())
+
+    def _add_vacancy(self, vac, profession):
+        """
+        Учитывает вакансию в статистике
+        :param vac: Vacancy
+            вакансия
+        :param profession: str
+            навзвание профессии
+        """
+        self.salary_count_by_year.add_data(vac.year, vac.average_salary, 1)
+        if profession in vac.name:
+            self.job_salary_count_by_year.add_data(vac.year, vac.average_salary, 1)
+        else:
+            self.job_salary_count_by_year.add_data(vac.year, 0, 0)
+        self.salary_count_by_city.add_data(vac.area_name, vac.average_salary)
 
     def get_statistic(self):
         """
@@ -334,25 +1096,15 @@ class Vacancy:
         средняя зарплата в рублях
     area_name : str
         название региона
-    published_at : datetime
-        дата публикации
-    _currency_to_rub : dict[str, float | int]
-        словарь для перевода в рубли
+    date : int
+        дата публикации в виде числа ГГГГММДД
+    year : int
+        год публикации
+    published_at : str
+        дата публикации в виде: Д.М.Г (форматируется при обращении)
     """
-    _currency_to_rub = {
-        "AZN": 35.68,
-        "BYR": 23.91,
-        "EUR": 59.90,
-        "GEL": 21.74,
-        "KGS": 0.76,
-        "KZT": 0.13,
-        "RUR": 1,
-        "UAH": 1.64,
-        "USD": 60.66,
-        "UZS": 0.0055,
-    }
-
-    def __init__(self, name, salary_from, salary_to, salary_currency, area_name, published_at):
+
+    def __init__(self, name, salary_from, salary_to, salary_currency, area_name, published_at, date=None):
         """
         Инициализация обьекта
         :param name: str
@@ -367,16 +1119,65 @@ class Vacancy:
             название региона
         :param published_at: str
             дата публикации
+        :param date: int | None
+            уже разобранная дата публикации в виде числа ГГГГММДД (None - разобрать published_at)
         """
         self.name = name
-        self.average_salary = (float(salary_from) + float(salary_to)) / 2 * Vacancy._currency_to_rub[
-            salary_currency]
+        self.average_salary = Vacancy.get_average_salary(salary_from, salary_to, salary_currency, published_at)
         self.area_name = area_name
-        self.published_at = ".".join(reversed(published_at[:10].split("-")))
-        # res_data = datetime.strptime(data, "%Y-%m-%dT%H:%M:%S%z")
-        # f"{res_data.day}.{res_data.month:02}.{res_data.year}"
+        self.date = date_number(published_at) if date is None else date
+        self.year = self.date // 10000
 
-        # datetime.datetime.strptime(published_at, "%Y-%m-%dT%H:%M:%S%z")
+    @property
+    def published_at(self):
+        return format_date(self.date)
+
+    @staticmethod
+    def get_average_salary(salary_from, salary_to, salary_currency, published_at=None):
+        """
+        :param salary_from: str
+            нижняя граница оклада
+        :param salary_to: str
+            верхняя граница оклада
+        :param salary_currency: str
+            валюта
+        :param published_at: str | None
+            дата публикации, по месяцу которой берётся курс валюты
+        :return: float
+            средний оклад в рублях
+        :raises KeyError: курс валюты неизвестен
+
+        >>> Vacancy.get_average_salary("10000", "30000.0", "RUR", "2022-12-20T00:18:19+0300")
+        20000.0
+        """
+        return (float(salary_from) + float(salary_to)) / 2 * CurrencyRates.get_default().get_rate(salary_currency,
+                                                                                                  published_at)
+
+    @classmethod
+    def from_values(cls, name, average_salary, area_name, date):
+        """
+        Создаёт вакансию из уже обработанных значений колоночного хранилища
+        :param name: str
+            название вакансии
+        :param average_salary: float
+            средний оклад в рублях
+        :param area_name: str
+            название региона
+        :param date: int
+            дата публикации в виде числа ГГГГММДД
+        :return: Vacancy
+
+        >>> vac = Vacancy.from_values("Аналитик", 40000.0, "Пермь", 20110102)
+        >>> vac.year, vac.published_at
+        (2011, '02.01.2011')
+        """
+        vac = cls.__new__(cls)
+        vac.name = name
+        vac.average_salary = average_salary
+        vac.area_name = area_name
+        vac.date = date
+        vac.year = date // 10000
+        return vac
 
 
 class Report:
@@ -431,13 +1232,14 @@ class Report:
         """
         Генерирует png файл с графиками
         """
-        fig, ax = plt.subplots(2, 2)
-        self._create_first_graph(ax[0, 0])
-        self._create_second_graph(ax[0, 1])
-        self._create_third_graph(ax[1, 0])
-        self._create_fourth_graph(ax[1, 1])
-        plt.tight_layout()
-        plt.savefig("graph.png")
+        with profiler.stage("render chart"):
+            fig, ax = plt.subplots(2, 2)
+            self._create_first_graph(ax[0, 0])
+            self._create_second_graph(ax[0, 1])
+            self._create_third_graph(ax[1, 0])
+            self._create_fourth_graph(ax[1, 1])
+            plt.tight_layout()
+            plt.savefig("graph.png")
         plt.show()
 
     def _create_first_graph(self, ax):
@@ -520,23 +1322,29 @@ class Report:
              "heads_years": heads_years,
              "heads_cities": heads_cities})
         config = pdfkit.configuration(wkhtmltopdf=r'D:\Проги\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options={"enable-local-file-access": None})
+        with profiler.stage("render pdf"):
+            pdfkit.from_string(pdf_template, 'report.pdf', configuration=config,
+                               options={"enable-local-file-access": None})
 
 
 def get_statistic():
     """
     Запускает процесс для формирования отчёта по статистике
+
+    Если у файла уже есть кэш колонок, статистика собирается по нему, иначе файл читается потоково
+    (память не зависит от размера файла, кэш при этом не создаётся)
     :return: формирует pdf файл со статистикой по вакансиям
     """
     file_name = input('Введите название файла: ')
     profession = input('Введите название профессии: ')
-    data = DataSet(file_name)
-    data.collect_statistic(profession)
-    data.print_statistic()
-
-    rep = Report(*data.get_statistic(), profession)
-    rep.generate_image()
-    rep.generate_pdf()
+    with profiler.stage('statistic'):
+        data = DataSet(file_name, streaming=not DataSet.has_cache(file_name), use_cache=True)
+        data.collect_statistic(profession)
+        data.print_statistic()
+
+        rep = Report(*data.get_statistic(), profession)
+        rep.generate_image()
+        rep.generate_pdf()
 
 
 # get_statistic()
@@ -1,6 +1,11 @@
+import os
 import pandas as pd
+import csv_cache
 import pdfkit
 from jinja2 import Environment, FileSystemLoader
+from partition_manifest import select_partitions
+from year_partitioner import read_partition
+import profiler
 
 
 def get_dataframes(file, vacancy, area_name):
@@ -9,9 +14,57 @@ def get_dataframes(file, vacancy, area_name):
     :param vacancy: Название вакансии
     :param area_name: Название региона
     :return: датафреймы со статистикой по городам, по годам для определенной вакансии и региона
+        (годы - по возрастанию)
+    """
+    with profiler.stage('read') as current:
+        vacancies = csv_cache.read_csv(file)
+        current.rows = len(vacancies)
+    with profiler.stage('clean', len(vacancies)):
+        vacancies = vacancies.dropna()
+        vacancies['Год'] = vacancies['published_at'].str[:4]
+    with profiler.stage('aggregate', len(vacancies)):
+        return get_city_tables(vacancies) + [get_vacancy_table(vacancies, vacancy, area_name,
+                                                               sorted(vacancies['Год'].unique()))]
+
+
+def get_dataframes_from_partitions(directory, vacancy, area_name):
+    """
+    То же, что get_dataframes, но по файлам годов (year_partitioner.partition_by_year с dropna=True).
+    Для статистики по городам читаются только нужные столбцы, для статистики региона - только партиции,
+    в которых по манифесту может встречаться регион.
+    :param directory: Папка с файлами годов
+    :param vacancy: Название вакансии
+    :param area_name: Название региона
+    :return: датафреймы со статистикой по городам, по годам для определенной вакансии и региона
+        (годы - по возрастанию, как в get_dataframes)
+    """
+    with profiler.stage('read') as current:
+        files = select_partitions(directory)
+        vacancies = _read_partitions(files, ['name', 'salary', 'area_name']).dropna()
+        region = _read_partitions(select_partitions(directory, area_name=area_name)).dropna()
+        region['Год'] = region['published_at'].str[:4]
+        current.rows = len(vacancies)
+    years = sorted(os.path.basename(file)[len('part_'):len('part_') + 4] for file in files)
+    with profiler.stage('aggregate', len(vacancies)):
+        return get_city_tables(vacancies) + [get_vacancy_table(region, vacancy, area_name, years)]
+
+
+def _read_partitions(files, usecols=None):
+    """
+    :param files: Файлы годов (csv или parquet)
+    :param usecols: Читаемые столбцы (None - все)
+    :return: датафрейм со строками всех файлов
+    """
+    if not files:
+        return pd.DataFrame(columns=usecols or ['name', 'salary', 'area_name', 'published_at'])
+    return pd.concat([read_partition(file, usecols) for file in files], ignore_index=True)
+
+
+def get_city_tables(vacancies):
+    """
+    :param vacancies: Датафрейм вакансий без пропусков
+    :return: датафреймы с топ-10 городов по средней зарплате и по доле вакансий
     """
-    vacancies = pd.read_csv(file)
-    vacancies = vacancies.dropna()
     vacancies_salary_city = round(vacancies[['area_name', 'salary']].groupby('area_name').mean())
     vacancies_count_city = vacancies.groupby('area_name')['name'].count()
 
@@ -29,9 +82,17 @@ def get_dataframes(file, vacancy, area_name):
                                                                                                       ascending=0).head(
         10)
     vacancies_count_city_top.rename(columns={'area_name': 'Регион', 'name': 'Количество вакансий'}, inplace=True)
+    return [vacancies_salary_city_top, vacancies_count_city_top]
 
-    vacancies['Год'] = vacancies['published_at'].str[:4]
 
+def get_vacancy_table(vacancies, vacancy, area_name, years):
+    """
+    :param vacancies: Датафрейм вакансий без пропусков со столбцом 'Год'
+    :param vacancy: Название вакансии
+    :param area_name: Название региона
+    :param years: Годы, которые должны попасть в таблицу
+    :return: датафрейм со статистикой по годам для определенной вакансии и региона
+    """
     vacancy_salary = round(vacancies[(vacancies['name'].str.lower().str.contains(vacancy.lower())) & (
             vacancies['area_name'].str.lower() == area_name.lower())][['Год', 'salary']].groupby('Год').mean())
     vacancy_count = vacancies[(vacancies['name'].str.lower().str.contains(vacancy.lower())) & (
@@ -40,9 +101,9 @@ def get_dataframes(file, vacancy, area_name):
         .reset_index(level=0)
     statistic_vacancy.rename(columns={'salary': f'Средняя зарплата',
                                       'name': f'Количество вакансий'}, inplace=True)
-    statistic_vacancy = pd.merge(pd.DataFrame({'Год': vacancies['Год'].unique()}), statistic_vacancy, how='left',
+    statistic_vacancy = pd.merge(pd.DataFrame({'Год': years}), statistic_vacancy, how='left',
                                  on='Год').fillna(0).astype(int)
-    return [vacancies_salary_city_top, vacancies_count_city_top, statistic_vacancy]
+    return statistic_vacancy
 
 
 def get_pdf(dataframes, vacancy, area_name):
@@ -53,14 +114,17 @@ def get_pdf(dataframes, vacancy, area_name):
                                     'table2': dataframes[2].to_html(index=False),
                                     'vacancy': vacancy, 'area_name': area_name})
     config = pdfkit.configuration(wkhtmltopdf=r'D:\Проги\wkhtmltopdf\bin\wkhtmltopdf.exe')
-    pdfkit.from_string(pdf_template, 'statistic_city_with_pandas.pdf',
-                       configuration=config, options={"enable-local-file-access": ""})
+    with profiler.stage('render pdf'):
+        pdfkit.from_string(pdf_template, 'statistic_city_with_pandas.pdf',
+                           configuration=config, options={"enable-local-file-access": ""})
 
 
-# file = input('Введите название файла: ')
-# vacancy = input('Введите название профессии: ')
-# area_name = input('Введите название региона: ')
-file = r'D:\Учёба\Python\tyakin\step 1\join_salaries_field_vacancies_full.csv'
-vacancy = 'разработчик'
-area_name = 'Пермь'
-get_pdf(get_dataframes(file, vacancy, area_name), vacancy, area_name)
+if __name__ == '__main__':
+    # file = input('Введите название файла: ')
+    # vacancy = input('Введите название профессии: ')
+    # area_name = input('Введите название региона: ')
+    file = r'D:\Учёба\Python\tyakin\step 1\join_salaries_field_vacancies_full.csv'
+    vacancy = 'разработчик'
+    area_name = 'Пермь'
+    with profiler.stage('statistic_city'):
+        get_pdf(get_dataframes(file, vacancy, area_name), vacancy, area_name)
@@ -10,16 +10,21 @@
 # df = df
 # print(df)
 
-import multiprocessing
-import os
+import numpy as np
 import pandas as pd
 import concurrent.futures as con_fut
 import pdfkit
 from jinja2 import Environment, FileSystemLoader
+from profession_matcher import ProfessionMatcher
+from timestamps import Timestamps
+from executor import Executor
+from partition_manifest import select_partitions
+import profiler
+from year_partitioner import partition_by_year, read_partition
 
 
 class Solution:
-    def __init__(self, file_path, profession):
+    def __init__(self, file_path, profession, years=None):
         """
         Инициализация объекта
 
@@ -27,52 +32,68 @@ class Solution:
             файл/путь к файлу с данными
         :param profession: str
             требуемая профессия, по которой будет составляться аналитика
+        :param years: (int, int) | None
+            диапазон годов включительно (None - все годы)
         """
         self.file_path = file_path
         self.profession = profession
+        self.years = years
 
         self.salary_by_years = {}
         self.count_by_years = {}
         self.prof_salary_by_years = {}
         self.prof_count_by_years = {}
+        self.statistic_by_profession = {}
 
     def divide_file_by_year(self):
         """
         Разделяет входной файл на более мелкие, группирую по годам
+
+        Файл читается потоково, кусками (см. year_partitioner.partition_by_year)
         """
-        df = pd.read_csv(self.file_path)
-        df = df.dropna()
-        df["year"] = df["published_at"].apply(lambda s: s[:4])
-        df = df.groupby("year")
-        for year, data in df:
-            data[["name", "salary", "area_name", "published_at"]].to_csv(rf"divided_files_csv\part_{year}.csv",
-                                                                         index=False)
+        with profiler.stage("partition") as current:
+            counts = partition_by_year(self.file_path, "divided_files_csv",
+                                       ["name", "salary", "area_name", "published_at"], dropna=True)
+            current.rows = sum(counts.values())
 
     def get_statistic_by_year(self, file_csv):
         """
         Сосавляет статистику по году
         :param file_csv: str
-            файл с данными за год
-        :return: (str, [int, int, int, int])
+            файл с данными за год (csv или parquet)
+        :return: (int, [int, int, int, int])
             (год, [ср. зп, всего вакансий, ср. зп для профессии, вакансий по профессии])
         """
-        df = pd.read_csv(file_csv)
-        df["published_at"] = df["published_at"].apply(lambda s: int(s[:4]))
+        df = read_partition(file_csv)
         df_vac = df[df["name"].str.contains(self.profession)]
 
-        return df["published_at"].values[0], [int(df["salary"].mean()), len(df),
-                                              int(df_vac["salary"].mean() if len(df_vac) != 0 else 0), len(df_vac)]
+        return Solution._partition_year(df), [int(df["salary"].mean()), len(df),
+                                               int(df_vac["salary"].mean() if len(df_vac) != 0 else 0), len(df_vac)]
+
+    @staticmethod
+    def _partition_year(df):
+        """
+        :param df: DataFrame
+            строки файла года
+        :return: int
+            год публикации вакансий файла (timestamps.Timestamps, как и во всех путях статистики по годам)
+        """
+        return int(Timestamps(df["published_at"]).year[0])
 
-    def get_statistic(self):
+    def get_statistic(self, backend="process", workers=None):
         """
         Собирает статистику по годам
 
-        Использует несколько процессов для работы
+        Использует несколько процессов для работы (см. executor.Executor)
+        :param backend: str
+            способ выполнения: serial, thread, process или futures
+        :param workers: int | None
+            количество потоков/процессов (по умолчанию - количество ядер)
         """
-        files = [rf"divided_files_csv\{file_name}" for file_name in os.listdir("divided_files_csv")]
-        pool = multiprocessing.Pool(4)
-        res_list = pool.starmap(self.get_statistic_by_year, [(file,) for file in files])
-        pool.close()
+        files = select_partitions("divided_files_csv", years=self.years)
+        with profiler.stage("aggregate") as current:
+            res_list = Executor(backend, workers).map_files(self.get_statistic_by_year, files)
+            current.rows = sum(data_stat[1] for _, data_stat in res_list)
 
         for year, data_stat in res_list:
             self.salary_by_years[year] = data_stat[0]
@@ -80,6 +101,62 @@ class Solution:
             self.prof_salary_by_years[year] = data_stat[2]
             self.prof_count_by_years[year] = data_stat[3]
 
+    @staticmethod
+    def get_statistic_by_year_batch(file_csv, professions):
+        """
+        Сосавляет статистику по году сразу для нескольких профессий
+
+        Профессии ищутся как подстроки (без регулярных выражений) за один проход автоматом Ахо-Корасик
+        по уникальным названиям вакансий года.
+        :param file_csv: str
+            файл с данными за год (csv или parquet)
+        :param professions: str[]
+            названия профессий
+        :return: (int, [int, int, dict[str, [int, int]]])
+            (год, [ср. зп, всего вакансий, профессия - [ср. зп для профессии, вакансий по профессии]])
+        """
+        df = read_partition(file_csv)
+        codes, names = pd.factorize(df["name"])
+        matcher = ProfessionMatcher(professions)
+        name_matches = np.zeros((len(names), len(professions)), dtype=bool)
+        for i, name in enumerate(names):
+            name_matches[i, list(matcher.match(name))] = True
+        row_matches = name_matches[codes]
+
+        salary = df["salary"].to_numpy(dtype=float)
+        by_profession = {}
+        for i, profession in enumerate(professions):
+            prof_salary = salary[row_matches[:, i]]
+            by_profession[profession] = [int(np.nanmean(prof_salary)) if len(prof_salary) != 0 else 0,
+                                         len(prof_salary)]
+        return Solution._partition_year(df), [int(df["salary"].mean()), len(df), by_profession]
+
+    def get_statistic_batch(self, professions, backend="process", workers=None):
+        """
+        Собирает статистику по годам сразу для нескольких профессий, читая каждый файл года один раз
+
+        Использует несколько процессов для работы (см. executor.Executor)
+        :param professions: str[]
+            названия профессий
+        :param backend: str
+            способ выполнения: serial, thread, process или futures
+        :param workers: int | None
+            количество потоков/процессов (по умолчанию - количество ядер)
+        """
+        files = select_partitions("divided_files_csv", years=self.years)
+        with profiler.stage("aggregate") as current:
+            res_list = Executor(backend, workers).map_files(Solution.get_statistic_by_year_batch, files, professions)
+            current.rows = sum(data_stat[1] for _, data_stat in res_list)
+
+        for profession in professions:
+            self.statistic_by_profession[profession] = ({}, {})
+        for year, data_stat in res_list:
+            self.salary_by_years[year] = data_stat[0]
+            self.count_by_years[year] = data_stat[1]
+            for profession, (salary, count) in data_stat[2].items():
+                self.statistic_by_profession[profession][0][year] = salary
+                self.statistic_by_profession[profession][1][year] = count
+
     def print_statistic(self):
         print(f"Динамика уровня зарплат по годам: {self.salary_by_years}")
         print(f"Динамика количества вакансий по годам: {self.count_by_years}")
@@ -100,15 +177,17 @@ class Solution:
              "profession_count_by_year": self.prof_count_by_years,
              "heads_years": heads_years, })
         config = pdfkit.configuration(wkhtmltopdf=r'D:\Проги\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'statistic_with_pandas.pdf', configuration=config,
-                           options={"enable-local-file-access": None})
+        with profiler.stage("render pdf"):
+            pdfkit.from_string(pdf_template, 'statistic_with_pandas.pdf', configuration=config,
+                               options={"enable-local-file-access": None})
 
 
 if __name__ == '__main__':
     file = input("Введите название файла: ")
     profession = input("Введите название профессии: ")
     solve = Solution(file, profession)
-    solve.divide_file_by_year()
-    solve.get_statistic()
-    solve.generate_pdf()
+    with profiler.stage("statistic_with_pandas"):
+        solve.divide_file_by_year()
+        solve.get_statistic()
+        solve.generate_pdf()
     # solve.print_statistic()
@@ -2,6 +2,14 @@ from prettytable import PrettyTable
 import csv
 import re
 import datetime
+import heapq
+import numpy as np
+import csv_cache
+from external_sort import external_sort
+import profiler
+from currency_rates import CurrencyRates
+from vacancy_index import VacancyIndex
+from vacancy_query import Query, column_values, split_conditions
 
 # region service
 # region dictionaries
@@ -60,6 +68,17 @@ weight_for_work_experience = {
 # endregion
 dictionaries = [title, currency, work_experience, salary_gross, true_false_dic]
 
+HTML_TAG = re.compile(r'<[^>]*>')
+# Короткие значения (регион, валюта, опыт работы, компания, оклад) повторяются во многих строках,
+# поэтому результат их очистки запоминается
+CLEAN_MEMO_LENGTH = 64
+CLEAN_MEMO_SIZE = 100000
+_clean_memo = {False: {}, True: {}}
+# Поля с произвольным текстом, которые у вакансий из csv очищаются только при первом обращении
+LAZY_FIELDS = ('name', 'description', 'experience_id', 'premium', 'employer_name', 'area_name')
+# Категориальные поля: хранятся словарным кодированием (коды и общий словарь значений)
+CATEGORY_FIELDS = ('area_name', 'salary_currency', 'experience_id', 'premium', 'salary_gross', 'employer_name')
+
 
 def exit_with_print_message(exit_message=''):
     """
@@ -85,70 +104,244 @@ class DataSet:
         список вакансий
     """
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, use_cache=False, filter_parameters='', use_index=False):
         """
         Инициализация обьекта
         :param file_name: str
             имя/полный путь файла
+        :param use_cache: bool
+            хранить очищенные столбцы в двоичном кэше (csv_cache), чтобы следующие запуски не разбирали csv
+        :param filter_parameters: str
+            запрос фильтрации (как в filter_data). Фильтр проверяется при чтении файла, поэтому для неподходящих
+            строк не очищаются остальные поля и не создаются вакансии
+        :param use_index: bool
+            вместе с use_cache: искать строки фильтра и сортировать по вторичным индексам (vacancy_index),
+            которые хранятся рядом с кэшем
+
+        Категориальные поля (CATEGORY_FIELDS) хранятся словарным кодированием: у всех вакансий с одинаковым
+        значением один и тот же обьект строки, фильтр проверяет значения словаря, а сортировка по этим полям
+        идёт по целочисленным кодам.
         """
         self.file_name = file_name
-        self.vacancies_objects = DataSet._set_vacancies(*DataSet._csv_reader(file_name))
+        self._index = None
+        self._rows = None
+        self._categories = {}
+        condition = DataSet._compile_filter(filter_parameters)
+        with profiler.stage('read') as current:
+            columns = csv_cache.load(file_name, 'table', decode=False) if use_cache else None
+            if columns is None and use_cache:
+                headers, vacancies = DataSet._csv_reader(file_name)
+                current.rows = len(vacancies)
+                with profiler.stage('clean', len(vacancies)):
+                    csv_cache.save(file_name, 'table', DataSet._clean_columns(headers, vacancies))
+                columns = csv_cache.load(file_name, 'table', decode=False)
+            is_raw = columns is None
+            if is_raw:
+                headers, vacancies = DataSet._csv_reader(file_name, condition)
+                current.rows = len(vacancies)
+                columns = dict((item, [vac[i] for vac in vacancies]) for i, item in enumerate(headers))
+                with profiler.stage('encode', len(vacancies)):
+                    self._categories = DataSet._encode_categories(columns)
+                    columns.update((name, column_values(column)) for name, column in self._categories.items())
+                self._rows = np.arange(len(vacancies))
+            else:
+                self._categories = dict((name, columns[name]) for name in CATEGORY_FIELDS)
+                if use_index:
+                    with profiler.stage('index'):
+                        self._index = VacancyIndex.open(file_name, columns)
+                with profiler.stage('filter'):
+                    columns, self._rows = DataSet._select_rows(columns, condition, self._index)
+        with profiler.stage('parse') as current:
+            self.vacancies_objects = DataSet._set_vacancies(columns, is_raw)
+            current.rows = len(self.vacancies_objects)
+        if condition is not None and len(self.vacancies_objects) == 0:
+            exit_with_print_message('Ничего не найдено')
 
     @staticmethod
-    def _set_vacancies(headers, vacancies):
+    def _compile_filter(filter_parameters):
         """
-        Создаёт массив вакансий
+        Разбирает запрос фильтрации в условие на очищенные значения столбцов
+        :param filter_parameters: str
+            запрос вида: параметр: значение И параметр: значение ИЛИ параметр: значение (см. vacancy_query)
+        :return: Query | None
+            условие; None - фильтра нет
+
+        >>> query = DataSet._compile_filter('Навыки: Git, SQL И Опыт работы: Нет опыта')
+        >>> query.columns
+        ['experience_id', 'key_skills']
+        >>> query.match({'key_skills': 'SQL\\nGit', 'experience_id': 'noExperience'})
+        True
+        >>> DataSet._compile_filter('Компания: ООО Рога И Копыта').match({'employer_name': 'ООО Рога И Копыта'})
+        True
+        >>> query = DataSet._compile_filter('Оклад: 50000 ИЛИ Дата публикации вакансии: 01.01.2022 - 31.12.2022')
+        >>> query.match({'salary_from': '60000.0', 'salary_to': '70000.0', 'published_at': '2022-07-01T10:00:00+0300'})
+        True
+        """
+        if filter_parameters == '':
+            return None
+        return Query.parse(filter_parameters, lambda word: DataSet.translate(word, dictionaries, True))
+
+    @staticmethod
+    def _select_rows(columns, condition=None, index=None):
+        """
+        Оставляет в столбцах кэша только строки, удовлетворяющие условию (проверка сразу по столбцам).
+        Условие проверяется по закодированным столбцам, декодируются только выбранные строки.
+        Если индекс находит строки-кандидаты, остальные строки не проверяются
+        :param columns: dict[str, (ndarray, str[])]
+            заглавие - столбец кэша (коды и словарь)
+        :param condition: Query | None
+            условие фильтрации
+        :param index: VacancyIndex | None
+            вторичные индексы столбцов
+        :return: (dict[str, ndarray], ndarray)
+            очищенные значения выбранных строк и номера этих строк в кэше
+
+        >>> columns, rows = DataSet._select_rows({'area_name': (np.array([0, 1, 0]), ['Москва', 'Пермь']),
+        ...                                       'name': (np.array([0, 0, 1]), ['Аналитик', 'Программист'])},
+        ...                                      DataSet._compile_filter('Название региона: Москва'))
+        >>> columns['name'].tolist(), rows.tolist()
+        (['Аналитик', 'Программист'], [0, 2])
+        """
+        rows = index.rows_for(condition) if index is not None and condition is not None else None
+        if condition is not None:
+            if rows is None:
+                rows = np.flatnonzero(condition.mask(columns))
+            else:
+                candidates = dict((name, (np.asarray(columns[name][0])[rows], columns[name][1]))
+                                  for name in condition.columns)
+                rows = rows[condition.mask(candidates)]
+        columns = dict((name, column_values(values, rows)) for name, values in columns.items())
+        if rows is None:
+            rows = np.arange(len(next(iter(columns.values()))))
+        return columns, rows
+
+    @staticmethod
+    def _encode_categories(columns):
+        """
+        Словарное кодирование категориальных полей вакансий из csv: каждое различное значение очищается один раз
+        :param columns: dict[str, str[]]
+            заглавие - неочищенные значения столбца
+        :return: dict[str, (ndarray, str[])]
+            категориальное поле - коды и словарь очищенных значений
+
+        >>> codes, vocab = DataSet._encode_categories(dict((name, ['Москва', '<b>Пермь</b>', 'Москва'])
+        ...                                                for name in CATEGORY_FIELDS))['area_name']
+        >>> codes.tolist(), vocab
+        ([0, 1, 0], ['Москва', 'Пермь'])
+        """
+        categories = {}
+        for name in CATEGORY_FIELDS:
+            index = {}
+            codes = np.fromiter((index.setdefault(value, len(index)) for value in columns[name]), dtype=np.int32,
+                                count=len(columns[name]))
+            categories[name] = (codes, [DataSet._clean_string(value, False) for value in index])
+        return categories
+
+    @staticmethod
+    def _clean_columns(headers, vacancies):
+        """
+        Очищает значения вакансий и раскладывает их по столбцам
         :param headers: str[]
             заглавия
         :param vacancies: str[]
             вакансии
+        :return: dict[str, str[]]
+            заглавие - очищенные значения столбца
+        """
+        return dict((item, [DataSet._clean_string(vac[i], i == 2) for vac in vacancies])
+                    for i, item in enumerate(headers))
+
+    @staticmethod
+    def _set_vacancies(columns, is_raw=False):
+        """
+        Создаёт массив вакансий
+        :param columns: dict[str, str[]]
+            заглавие - значения столбца
+        :param is_raw: bool
+            значения не очищены (прочитаны из csv)
         :return: Vacancy[]
             массив вакансий
         """
-        list_vacancies = []
-        for vac in vacancies:
-            dic = {}
-            for i, item in enumerate(headers):
-                dic[item] = DataSet._clean_string(vac[i], i == 2)
-            list_vacancies.append(Vacancy(dic['name'],
-                                          dic['description'],
-                                          dic['key_skills'].split('\n'),
-                                          dic['experience_id'],
-                                          dic['premium'],
-                                          dic['employer_name'],
-                                          Salary(dic['salary_from'],
-                                                 dic['salary_to'],
-                                                 dic['salary_gross'],
-                                                 dic['salary_currency']),
-                                          dic['area_name'],
-                                          dic['published_at']))
-
-        return list_vacancies
+        return [DataSet._create_vacancy(dict(zip(columns.keys(), values)), is_raw)
+                for values in zip(*columns.values())]
 
     @staticmethod
-    def _csv_reader(file_name):
+    def _create_vacancy(dic, is_raw=False):
+        """
+        :param dic: dict[str, str]
+            заглавие - значение
+        :param is_raw: bool
+            значения не очищены (кроме закодированных CATEGORY_FIELDS): поля LAZY_FIELDS очищаются
+            при первом обращении (Vacancy.from_raw)
+        :return: Vacancy
+        """
+        if is_raw:
+            return Vacancy.from_raw(dic, CATEGORY_FIELDS)
+        return Vacancy(dic['name'],
+                       dic['description'],
+                       dic['key_skills'].split('\n'),
+                       dic['experience_id'],
+                       dic['premium'],
+                       dic['employer_name'],
+                       Salary(dic['salary_from'],
+                              dic['salary_to'],
+                              dic['salary_gross'],
+                              dic['salary_currency'],
+                              dic['published_at']),
+                       dic['area_name'],
+                       dic['published_at'])
+
+    @staticmethod
+    def _csv_reader(file_name, condition=None):
         """
         Считывает данные с csv файла
         :param file_name: str
             имя/полный путь файла
+        :param condition: Query | None
+            условие фильтрации: для проверки очищаются только его столбцы
         :return: (str[], str[])
             заглавия(параметры), значения(сами вакансии)
         """
-        file_csv = csv.reader(open(file_name, encoding='utf_8_sig'))
-        list_data = [x for x in file_csv]
-        if len(list_data) == 1:
-            exit_with_print_message('Нет данных')
-        if len(list_data) == 0:
-            exit_with_print_message('Пустой файл')
-        titles = list_data[0]
-        values = [x for x in list_data[1:] if x.count('') == 0 and len(x) == len(titles)]
+        rows = DataSet._iter_csv(file_name, condition)
+        titles = next(rows)
+        return titles, list(rows)
 
-        return titles, values
+    @staticmethod
+    def _iter_csv(file_name, condition=None):
+        """
+        Построчно считывает csv файл, не держа его в памяти
+        :param file_name: str
+            имя/полный путь файла
+        :param condition: Query | None
+            условие фильтрации: для проверки очищаются только его столбцы
+        :return: Iterator[str[]]
+            сначала заглавия, затем вакансии без пропусков, удовлетворяющие условию
+        """
+        with open(file_name, encoding='utf_8_sig') as file:
+            file_csv = csv.reader(file)
+            titles = next(file_csv, None)
+            if titles is None:
+                exit_with_print_message('Пустой файл')
+            yield titles
+            is_empty = True
+            if condition is not None:
+                indexes = [(name, titles.index(name)) for name in condition.columns]
+            for x in file_csv:
+                is_empty = False
+                if x.count('') == 0 and len(x) == len(titles) and \
+                        (condition is None or condition.match(dict((name, DataSet._clean_string(x[i], i == 2))
+                                                                   for name, i in indexes))):
+                    yield x
+        if is_empty:
+            exit_with_print_message('Нет данных')
 
     @staticmethod
     def _clean_string(string, is_skills):
         """
         Удаляет html теги и лишние пробелы из строки
+
+        Регулярное выражение тегов применяется только к строкам, где есть "<", пробелы схлопываются
+        split/join без регулярных выражений; очистка коротких строк запоминается.
         :param string: str
             строка для обработки
         :param is_skills: bool
@@ -156,9 +349,19 @@ class DataSet:
         :return: str
             преобразованная строка
         """
-        string = re.sub(r'<[^>]*>', '', string)
-        string = ' '.join(string.split(' ')) if is_skills else ' '.join(string.split())
-        return string
+        is_short = len(string) <= CLEAN_MEMO_LENGTH
+        if is_short:
+            memo = _clean_memo[is_skills]
+            result = memo.get(string)
+            if result is not None:
+                return result
+        result = HTML_TAG.sub('', string) if '<' in string else string
+        # у навыков пробелы не схлопываются: ' '.join(string.split(' ')) не меняет строку
+        if not is_skills:
+            result = ' '.join(result.split())
+        if is_short and len(memo) < CLEAN_MEMO_SIZE:
+            memo[string] = result
+        return result
 
     @staticmethod
     def translate(word, dictionaries=[title], reverse=False):
@@ -183,79 +386,156 @@ class DataSet:
         """
         Филтрация вакансий по параметру
         :param filter_parameters: str
-            парметр филтрации вида: параметр: значение параметра
+            запрос вида: параметр: значение И параметр: значение ИЛИ параметр: значение (см. vacancy_query)
         :return: оставляет только вакансии, удовлетваряющие фильтру
         """
         if filter_parameters == '':
             return
-        field, value = (DataSet.translate(w, dictionaries, True) for w in filter_parameters.split(': '))
-        filter_data = []
-        for vac in self.vacancies_objects:
-            if DataSet._filter_vacancy(vac, field, value):
-                filter_data.append(vac)
+        condition = DataSet._compile_filter(filter_parameters)
+        keep = [condition.match(DataSet._vacancy_values(vac)) for vac in self.vacancies_objects]
+        filter_data = [vac for vac, is_match in zip(self.vacancies_objects, keep) if is_match]
         if len(filter_data) != 0:
             self.vacancies_objects = filter_data
+            if self._rows is not None:
+                self._rows = self._rows[np.array(keep, dtype=bool)]
         else:
             exit_with_print_message('Ничего не найдено')
 
     @staticmethod
-    def _filter_vacancy(vac, filter_field, filter_value):
+    def _vacancy_values(vac):
         """
-        Проверка, удовлетворяет ли вакансия фильтру
         :param vac: Vacancy
             вакансися
-        :param filter_field: str
-             параметр фильтрации
-        :param filter_value: str
-            значение параметра фильтрации
-        :return: bool
-        """
-
-        if filter_field == 'Оклад':
-            return float(vac.salary.salary_from) <= float(filter_value) <= float(vac.salary.salary_to)
-        if filter_field == 'salary_currency' or filter_value == 'salary_gross':
-            return vac.salary.__getattribute__(filter_field) == filter_value
-        if filter_field == 'key_skills':
-            for skill in filter_value.split(', '):
-                if skill not in vac.key_skills:
-                    return False
-            return True
-        if filter_field == 'published_at':
-            return ".".join(reversed(vac.published_at[:10].split("-"))) == filter_value
-            # res_data = datetime.strptime(data, "%Y-%m-%dT%H:%M:%S%z")
-            # f"{res_data.day}.{res_data.month:02}.{res_data.year}"
-            # datetime.datetime.strptime(vac.published_at, "%Y-%m-%dT%H:%M:%S%z").strftime("%d.%m.%Y") == filter_value
-        return vac.__getattribute__(filter_field) == filter_value
-
-    def sort_data(self, sort_parameter, is_reverse):
+        :return: dict[str, str]
+            значения вакансии по названиям столбцов файла (для проверки фильтра)
+        """
+        return {'name': vac.name, 'description': vac.description, 'key_skills': '\n'.join(vac.key_skills),
+                'experience_id': vac.experience_id, 'premium': vac.premium, 'employer_name': vac.employer_name,
+                'salary_from': vac.salary.salary_from, 'salary_to': vac.salary.salary_to,
+                'salary_gross': vac.salary.salary_gross, 'salary_currency': vac.salary.salary_currency,
+                'area_name': vac.area_name, 'published_at': vac.published_at}
+
+    def sort_data(self, sort_parameter, is_reverse, limit=None):
         """
         Сортировка вакансий по параметру
         :param sort_parameter: str
             параметр сортировки
         :param is_reverse: str
             восходящий порядок сортировки (да/нет)
+        :param limit: int | None
+            нужны только первые limit вакансий (например, для вывода диапазона): они выбираются кучей
+            (heapq) за O(n log limit) в том же порядке, что и при полной сортировке, остальные отбрасываются;
+            None - сортировать все вакансии
         :return: сортирует лист вакансий
         """
         if sort_parameter == '':
             return
+        sort_parameter, is_reverse = DataSet._sort_params(sort_parameter, is_reverse)
+        if limit is not None and limit >= len(self.vacancies_objects):
+            limit = None
+        rank = self._sort_rank(sort_parameter)
+        if rank is not None:
+            # ранги равных значений равны, поэтому устойчивая сортировка по рангу даёт тот же порядок
+            order = np.argsort(-rank if is_reverse else rank, kind='stable')[:limit]
+            self.vacancies_objects = [self.vacancies_objects[i] for i in order]
+            self._rows = self._rows[order]
+            return
+        self._rows = None
+        key = DataSet._sort_key(sort_parameter)
+        if limit is None:
+            self.vacancies_objects.sort(key=key, reverse=is_reverse)
+        else:
+            # nsmallest/nlargest устойчивы: совпадают с sorted(..., reverse=is_reverse)[:limit]
+            select = heapq.nlargest if is_reverse else heapq.nsmallest
+            self.vacancies_objects = select(limit, self.vacancies_objects, key=key)
+
+    def _sort_rank(self, sort_parameter):
+        """
+        Ранги вакансий для сортировки без вычисления ключа каждой вакансии: по вторичному индексу (оклад, дата)
+        или по кодам категориального поля
+        :param sort_parameter: str
+            столбец сортировки или "Оклад"
+        :return: ndarray | None
+            ранг каждой вакансии (у равных ключей равные ранги); None - ранги неизвестны
+        """
+        if self._rows is None:
+            return None
+        if self._index is not None and sort_parameter in ('Оклад', 'published_at'):
+            return self._index.rank('salary' if sort_parameter == 'Оклад' else sort_parameter)[self._rows]
+        if sort_parameter not in self._categories:
+            return None
+        codes, vocab = self._categories[sort_parameter]
+        keys = [weight_for_work_experience[value] for value in vocab] if sort_parameter == 'experience_id' else vocab
+        vocab_rank = np.empty(len(vocab), dtype=np.int64)
+        rank, previous = -1, None
+        for i, code in enumerate(sorted(range(len(vocab)), key=keys.__getitem__)):
+            if i == 0 or keys[code] != previous:
+                rank, previous = rank + 1, keys[code]
+            vocab_rank[code] = rank
+        return vocab_rank[np.asarray(codes)[self._rows]]
+
+    @staticmethod
+    def _sort_params(sort_parameter, is_reverse):
+        """
+        :param sort_parameter: str
+            параметр сортировки (по-русски)
+        :param is_reverse: str
+            восходящий порядок сортировки (да/нет)
+        :return: (str, bool)
+            столбец сортировки (или "Оклад") и сортировка по убыванию
+        """
         sort_parameter = DataSet.translate(sort_parameter, reverse=True)
         is_reverse = cast_to_bool_dic[is_reverse] if is_reverse in cast_to_bool_dic.keys() else bool(is_reverse)
+        return sort_parameter, is_reverse
+
+    @staticmethod
+    def _sort_key(sort_parameter):
+        """
+        :param sort_parameter: str
+            столбец сортировки или "Оклад"
+        :return: Callable[[Vacancy], object]
+            ключ сортировки вакансии
+        """
         if sort_parameter == 'Оклад':
-            self.vacancies_objects.sort(key=lambda vac: vac.salary.get_average_salary_in_rubles(),
-                                        reverse=is_reverse)
-            return
+            return lambda vac: vac.salary.get_average_salary_in_rubles()
         if sort_parameter == 'key_skills':
-            self.vacancies_objects.sort(key=lambda vac: len(vac.key_skills),
-                                        reverse=is_reverse)
-            return
+            return lambda vac: len(vac.key_skills)
         if sort_parameter == 'published_at':
-            self.vacancies_objects.sort(key=lambda vac: vac.published_at, reverse=is_reverse)
-            return
+            return lambda vac: vac.published_at
         if sort_parameter == 'experience_id':
-            self.vacancies_objects.sort(key=lambda vac: weight_for_work_experience[vac.experience_id],
-                                        reverse=is_reverse)
-            return
-        self.vacancies_objects.sort(key=lambda vac: vac.__getattribute__(sort_parameter), reverse=is_reverse)
+            return lambda vac: weight_for_work_experience[vac.experience_id]
+        return lambda vac: getattr(vac, sort_parameter)
+
+    @staticmethod
+    def iter_sorted(file_name, sort_parameter, is_reverse, filter_parameters='', run_size=100000, temp_dir=None):
+        """
+        Вакансии файла в порядке sort_data без загрузки всего файла в память
+
+        Файл читается построчно, вакансии сортируются внешней сортировкой слиянием (external_sort):
+        отсортированные прогоны по run_size вакансий вместе с ключами сбрасываются во временные файлы
+        и сливаются, поэтому в памяти находится не больше одного прогона.
+        :param file_name: str
+            имя/полный путь файла
+        :param sort_parameter: str
+            параметр сортировки ('' - порядок файла)
+        :param is_reverse: str
+            восходящий порядок сортировки (да/нет)
+        :param filter_parameters: str
+            запрос фильтрации (как в filter_data)
+        :param run_size: int
+            количество вакансий в прогоне
+        :param temp_dir: str | None
+            папка для временных файлов (None - системная)
+        :return: Iterator[Vacancy]
+            вакансии в порядке сортировки
+        """
+        rows = DataSet._iter_csv(file_name, DataSet._compile_filter(filter_parameters))
+        headers = next(rows)
+        vacancies = (Vacancy.from_raw(dict(zip(headers, row))) for row in rows)
+        if sort_parameter == '':
+            return vacancies
+        sort_parameter, is_reverse = DataSet._sort_params(sort_parameter, is_reverse)
+        return external_sort(vacancies, DataSet._sort_key(sort_parameter), is_reverse, run_size, temp_dir)
 
 
 class Vacancy:
@@ -282,6 +562,16 @@ class Vacancy:
         название региона
     published_at : str
         дата публикации
+
+    >>> vac = Vacancy.from_raw({'name': ' Python  <b>разработчик</b>', 'description': '<p>Код</p>\\n<p>ревью</p>',
+    ...                         'key_skills': 'Git\\nSQL', 'experience_id': 'noExperience', 'premium': 'False',
+    ...                         'employer_name': 'Компания', 'salary_from': '100', 'salary_to': '200',
+    ...                         'salary_gross': 'True', 'salary_currency': 'RUR', 'area_name': 'Москва',
+    ...                         'published_at': '2022-07-05T10:00:00+0300'})
+    >>> 'description' in vars(vac), vac.description, 'description' in vars(vac)
+    (False, 'Код ревью', True)
+    >>> vac.name, vac.key_skills
+    ('Python разработчик', ['Git', 'SQL'])
     """
 
     def __init__(self, name, description, key_skills, experience_id, premium, employer_name, salary, area_name,
@@ -308,13 +598,54 @@ class Vacancy:
         self.area_name = area_name
         self.published_at = published_at
 
+    @classmethod
+    def from_raw(cls, dic, cleaned=()):
+        """
+        Вакансия из неочищенных значений csv. Навыки, оклад и дата нужны сразу и очищаются при создании,
+        поля LAZY_FIELDS - при первом обращении, поэтому невыводимые поля (например, длинное описание в html)
+        не очищаются совсем
+        :param dic: dict[str, str]
+            заглавие - значение из csv
+        :param cleaned: str[]
+            поля, значения которых уже очищены
+        :return: Vacancy
+        """
+        def clean(field, is_skills=False):
+            return dic[field] if field in cleaned else DataSet._clean_string(dic[field], is_skills)
+
+        vac = cls.__new__(cls)
+        vac._raw = {}
+        for field in LAZY_FIELDS:
+            if field in cleaned:
+                vac.__dict__[field] = dic[field]
+            else:
+                vac._raw[field] = dic[field]
+        vac.key_skills = clean('key_skills', True).split('\n')
+        vac.published_at = clean('published_at')
+        vac.salary = Salary(clean('salary_from'), clean('salary_to'), clean('salary_gross'), clean('salary_currency'),
+                            vac.published_at)
+        return vac
+
+    def __getattr__(self, item):
+        """
+        Очищает поле вакансии из csv при первом обращении (вызывается, только если поля ещё нет)
+        """
+        raw = self.__dict__.get('_raw')
+        if raw is None or item not in raw:
+            raise AttributeError(item)
+        value = self.__dict__[item] = DataSet._clean_string(raw.pop(item), False)
+        return value
+
     def formatter(self):
         """
-        :return: переводит поля опыта работы и прмиаотной вакансии, форматирует дату в виде: Д.М.Г
+        Переводит поля опыта работы и премиальной вакансии, форматирует дату в виде: Д.М.Г
+        Сама вакансия не меняется, поэтому её можно выводить несколько раз
+        :return: dict[str, str]
+            поле - значение для вывода
         """
-        self.experience_id = work_experience[self.experience_id]
-        self.premium = true_false_dic[self.premium]
-        self.published_at = ".".join(reversed(self.published_at[:10].split("-")))
+        return {'experience_id': work_experience[self.experience_id],
+                'premium': true_false_dic[self.premium],
+                'published_at': ".".join(reversed(self.published_at[:10].split("-")))}
         # res_data = datetime.strptime(data, "%Y-%m-%dT%H:%M:%S%z")
         # f"{res_data.day}.{res_data.month:02}.{res_data.year}"
         # datetime.datetime.strptime(self.published_at, "%Y-%m-%dT%H:%M:%S%z").strftime("%d.%m.%Y")
@@ -338,23 +669,9 @@ class Salary:
         нижняя граница зп в рублях
     salary_to_rub : float
         верхняя граница зп в рублях
-    _currency_to_rub : dict[str, float | int]
-        словарь для конвертации валют
     """
-    _currency_to_rub = {
-        "AZN": 35.68,
-        "BYR": 23.91,
-        "EUR": 59.90,
-        "GEL": 21.74,
-        "KGS": 0.76,
-        "KZT": 0.13,
-        "RUR": 1,
-        "UAH": 1.64,
-        "USD": 60.66,
-        "UZS": 0.0055,
-    }
-
-    def __init__(self, salary_from, salary_to, salary_gross, salary_currency):
+
+    def __init__(self, salary_from, salary_to, salary_gross, salary_currency, published_at=None):
         """
         Инициализация обьекта
         :param salary_from: str
@@ -365,13 +682,16 @@ class Salary:
             до/после вычета налогов
         :param salary_currency: str
             валюта
+        :param published_at: str | None
+            дата публикации, по месяцу которой берётся курс валюты
         """
         self.salary_from = salary_from
         self.salary_to = salary_to
         self.salary_gross = salary_gross
         self.salary_currency = salary_currency
-        self.salary_from_rub = float(self.salary_from) * Salary._currency_to_rub[self.salary_currency]
-        self.salary_to_rub = float(self.salary_to) * Salary._currency_to_rub[self.salary_currency]
+        rate = CurrencyRates.get_default().get_rate(self.salary_currency, published_at)
+        self.salary_from_rub = float(self.salary_from) * rate
+        self.salary_to_rub = float(self.salary_to) * rate
 
     def get_average_salary_in_rubles(self):
         """
@@ -456,11 +776,13 @@ class InputConnect:
             возможные параметры для фильтрации
         """
         if filter_parameters != '':
-            if filter_parameters.count(': ') == 0:
-                exit_with_print_message('Формат ввода некорректен')
-            field = filter_parameters.split(': ')[0]
-            if field not in possible_fields:
-                exit_with_print_message('Параметр поиска некорректен')
+            for clause in split_conditions(filter_parameters, lambda field: field in possible_fields):
+                for condition in clause:
+                    if condition.count(': ') == 0:
+                        exit_with_print_message('Формат ввода некорректен')
+                    field = condition.split(': ')[0]
+                    if field not in possible_fields:
+                        exit_with_print_message('Параметр поиска некорректен')
 
     @staticmethod
     def _confirm_sort(sort_parameter, is_reverse, possible_fields):
@@ -481,13 +803,32 @@ class TableData:
     """
     Данные вакансий, оформелнные в виде таблицы
 
+    Строки таблицы создаются лениво: форматируются только вакансии из выводимого диапазона
+    и только выводимые столбцы.
+
     Atributes
     ---------
     data : Vacancy[]
         маассив вакансий
-    table : PrettyTable
-        таблица с вакансиями
+    field_names : str[]
+        все столбцы таблицы
+
+    >>> vac = Vacancy.from_raw({'name': 'Аналитик', 'description': 'Описание', 'key_skills': 'SQL',
+    ...                         'experience_id': 'noExperience', 'premium': 'False', 'employer_name': 'Компания',
+    ...                         'salary_from': '100', 'salary_to': '200', 'salary_gross': 'True',
+    ...                         'salary_currency': 'RUR', 'area_name': 'Москва',
+    ...                         'published_at': '2022-07-05T10:00:00+0300'})
+    >>> table = TableData([vac])
+    >>> first = table.table.get_string()
+    >>> pages = list(table.iter_pages([], ['Опыт работы', 'Дата публикации вакансии'], 1))
+    >>> pages == list(table.iter_pages([], ['Опыт работы', 'Дата публикации вакансии'], 1))
+    True
+    >>> 'Нет опыта' in pages[0] and '05.07.2022' in pages[0] and first == table._create_table(
+    ...     table.data, range(1), table.field_names).get_string()
+    True
     """
+    field_names = ['№', 'Название', 'Описание', 'Навыки', 'Опыт работы', 'Премиум-вакансия',
+                   'Компания', 'Оклад', 'Название региона', 'Дата публикации вакансии']
 
     def __init__(self, data):
         """
@@ -496,9 +837,19 @@ class TableData:
         :param data: Vacancy[]
         """
         self.data = data
-        self.table = TableData._create_table(data)
+        self._table = None
 
-    def print(self, indexes, parameters):
+    @property
+    def table(self):
+        """
+        :return: PrettyTable
+            таблица со всеми вакансиями и столбцами (создаётся при первом обращении)
+        """
+        if self._table is None:
+            self._table = TableData._create_table(self.data, range(len(self.data)), self.field_names)
+        return self._table
+
+    def print(self, indexes, parameters, page_size=None):
         """
         Выводит таблицу с вакансиями
 
@@ -506,29 +857,86 @@ class TableData:
             два числа - диапозон "от - до", одно число - стартовый номер для вывода
         :param parameters: str[]
             требуемые столбцы для отображения
+        :param page_size: int | None
+            выводить диапазон отдельными таблицами по page_size строк (None - одной таблицей)
+        """
+        if page_size is None:
+            print(TableData._create_table(self.data, self._window(indexes), self._fields(parameters)).get_string())
+            return
+        for page in self.iter_pages(indexes, parameters, page_size):
+            print(page)
+
+    def iter_pages(self, indexes, parameters, page_size):
+        """
+        Постранично форматирует диапазон вакансий: в памяти находится только одна страница
+
+        :param indexes: int[]
+            два числа - диапозон "от - до", одно число - стартовый номер для вывода
+        :param parameters: str[]
+            требуемые столбцы для отображения
+        :param page_size: int
+            количество строк на странице
+        :return: Iterator[str]
+            таблицы страниц (ширина столбцов считается по строкам страницы)
+        """
+        window = self._window(indexes)
+        fields = self._fields(parameters)
+        for first in range(0, len(window), page_size):
+            yield TableData._create_table(self.data, window[first:first + page_size], fields).get_string()
+
+    def _window(self, indexes):
+        """
+        :param indexes: int[]
+            два числа - диапозон "от - до", одно число - стартовый номер для вывода
+        :return: range
+            номера выводимых вакансий (как срез строк PrettyTable по start/end)
+        """
+        start = indexes[0] - 1 if len(indexes) >= 1 else 0
+        end = indexes[1] - 1 if len(indexes) == 2 else len(self.data)
+        if start < 0 or end < 0:
+            raise ValueError(f'Invalid value for {"start" if start < 0 else "end"}: {min(start, end)}')
+        return range(len(self.data))[start:end]
+
+    def _fields(self, parameters):
+        """
+        :param parameters: str[]
+            требуемые столбцы для отображения
+        :return: str[]
+            выводимые столбцы в порядке столбцов таблицы
         """
-        print(self.table.get_string(fields=['№', *parameters] if parameters.count('') == 0 else self.table.field_names,
-                                    start=indexes[0] - 1 if len(indexes) >= 1 else 0,
-                                    end=indexes[1] - 1 if len(indexes) == 2 else len(self.data)))
+        if parameters.count('') != 0:
+            return self.field_names
+        for parameter in parameters:
+            if parameter not in self.field_names:
+                raise ValueError(f'Invalid field name: {parameter}')
+        return [field for field in self.field_names if field == '№' or field in parameters]
 
     @staticmethod
-    def _create_table(data):
+    def _create_table(data, numbers, fields):
         """
         Создаёт таблицу с указанными данными
         :param data: Vacancy[]
+        :param numbers: range
+            номера вакансий, попадающих в таблицу
+        :param fields: str[]
+            столбцы таблицы
         :return: таблица с данными о вакансиях
         """
         result_table = PrettyTable()
-        result_table.field_names = ['№', 'Название', 'Описание', 'Навыки', 'Опыт работы', 'Премиум-вакансия',
-                                    'Компания', 'Оклад', 'Название региона', 'Дата публикации вакансии']
-        for i, vac in enumerate(data):
-            vac.formatter()
-            row = [i + 1]
-            for field in result_table.field_names[1:]:
-                if field == 'Оклад':
+        result_table.field_names = fields
+        attributes = [None if field in ('№', 'Оклад') else DataSet.translate(field, reverse=True)
+                      for field in fields]
+        for i in numbers:
+            vac = data[i]
+            formatted = vac.formatter()
+            row = []
+            for field, attribute in zip(fields, attributes):
+                if field == '№':
+                    row.append(i + 1)
+                elif field == 'Оклад':
                     row.append(vac.salary.get_formatted_info())
                 else:
-                    value = vac.__getattribute__(DataSet.translate(field, reverse=True))
+                    value = formatted[attribute] if attribute in formatted else getattr(vac, attribute)
                     value = '\n'.join(value) if type(value) == list else value
                     value = value[:100] + '...' if len(value) > 100 else value
                     row.append(value)
@@ -548,8 +956,12 @@ def get_table():
     :return: Выводит таблицу ASCII с вакансиями
     """
     params = InputConnect()
-    data = DataSet(params.file_name)
-    data.filter_data(params.filter_parameters)
-    data.sort_data(params.sort_parameter, params.is_reverse_sort)
-    table = TableData(data.vacancies_objects)
-    table.print(params.indexes, params.parameters)
+    with profiler.stage('table'):
+        data = DataSet(params.file_name, use_cache=True, filter_parameters=params.filter_parameters, use_index=True)
+        with profiler.stage('sort', len(data.vacancies_objects)):
+            # при диапазоне "от - до" выводятся только первые вакансии, остальные можно не упорядочивать
+            limit = params.indexes[1] - 1 if len(params.indexes) == 2 and params.indexes[1] > 0 else None
+            data.sort_data(params.sort_parameter, params.is_reverse_sort, limit)
+        with profiler.stage('render table', len(data.vacancies_objects)):
+            table = TableData(data.vacancies_objects)
+            table.print(params.indexes, params.parameters)
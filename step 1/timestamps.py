@@ -0,0 +1,193 @@
+import numpy as np
+
+# Дата публикации hh.ru: ГГГГ-ММ-ДДTчч:мм:сс+ЧЧММ, например 2022-12-20T00:18:19+0300
+TIMESTAMP_LENGTH = 24
+
+
+def date_number(text):
+    """
+    :param text: str
+        дата публикации (достаточно начала ГГГГ-ММ-ДД)
+    :return: int
+        дата в виде числа ГГГГММДД
+
+    >>> date_number("2022-12-20T00:18:19+0300")
+    20221220
+    """
+    return int(text[:4] + text[5:7] + text[8:10])
+
+
+def format_date(number):
+    """
+    :param number: int
+        дата в виде числа ГГГГММДД
+    :return: str
+        дата вида ДД.ММ.ГГГГ
+
+    >>> format_date(20110102)
+    '02.01.2011'
+    """
+    return f"{number % 100:02}.{number // 100 % 100:02}.{number // 10000}"
+
+
+class Timestamps:
+    """
+    Векторный разбор дат публикации
+
+    Строки один раз превращаются в матрицу кодов символов, из которой числа собираются арифметикой NumPy
+    без разбора каждой строки в Python. Столбцы вычисляются при первом обращении.
+
+    Atributes
+    ---------
+    year : ndarray[int32]
+        год
+    month : ndarray[int32]
+        год и месяц в виде числа ГГГГММ
+    date : ndarray[int32]
+        дата в виде числа ГГГГММДД
+    epoch : ndarray[int64]
+        секунды с 01.01.1970 UTC с учётом часового пояса
+
+    >>> stamps = Timestamps(["2022-12-20T00:18:19+0300", "1999-03-01T23:59:59-0130"])
+    >>> stamps.year.tolist(), stamps.month.tolist(), stamps.date.tolist()
+    ([2022, 1999], [202212, 199903], [20221220, 19990301])
+    >>> import datetime
+    >>> [int(datetime.datetime.strptime(s, "%Y-%m-%dT%H:%M:%S%z").timestamp())
+    ...  for s in ["2022-12-20T00:18:19+0300", "1999-03-01T23:59:59-0130"]] == stamps.epoch.tolist()
+    True
+    >>> Timestamps(["2022-12-2"]).date
+    Traceback (most recent call last):
+    ValueError: Неверный формат даты публикации: 2022-12-2
+    >>> Timestamps(["2022/12/20T00:18:19+0300"]).year
+    Traceback (most recent call last):
+    ValueError: Неверный формат даты публикации: 2022/12/20T00:18:19+0300
+    >>> Timestamps(["2022-12-20T00:18:19+0300 UTC"])
+    Traceback (most recent call last):
+    ValueError: Неверный формат даты публикации: 2022-12-20T00:18:19+0300 UTC
+    """
+
+    def __init__(self, values):
+        """
+        Инициализация обьекта
+        :param values: Sequence[str]
+            даты публикации (список, массив или Series)
+        """
+        values = np.asarray(values, dtype=str).reshape(-1)
+        if values.dtype.itemsize > TIMESTAMP_LENGTH * 4:
+            too_long = np.char.str_len(values) > TIMESTAMP_LENGTH
+            if too_long.any():
+                raise ValueError(f"Неверный формат даты публикации: {values[np.argmax(too_long)]}")
+        self._chars = values.astype(f"U{TIMESTAMP_LENGTH}", copy=False).view(np.uint32).reshape(-1, TIMESTAMP_LENGTH)
+        self._columns = {}
+
+    def _fail(self, invalid):
+        """
+        :param invalid: ndarray[bool]
+            строки с ошибкой формата
+        :raises ValueError: с текстом первой неверной строки
+        """
+        text = self._chars[np.argmax(invalid)].view(f"U{TIMESTAMP_LENGTH}")[0]
+        raise ValueError(f"Неверный формат даты публикации: {text}")
+
+    def _expect(self, separators):
+        """
+        Проверяет разделители во всех строках
+        :param separators: dict[int, str]
+            позиция - ожидаемый символ
+        """
+        for position, char in separators.items():
+            wrong = self._chars[:, position] != ord(char)
+            if wrong.any():
+                self._fail(wrong)
+
+    def _number(self, start, end):
+        """
+        :param start: int
+            позиция первой цифры
+        :param end: int
+            позиция после последней цифры
+        :return: ndarray[int32]
+            число из цифр на этих позициях каждой строки
+        """
+        digits = self._chars[:, start:end].astype(np.int32) - ord("0")
+        invalid = ((digits < 0) | (digits > 9)).any(axis=1)
+        if invalid.any():
+            self._fail(invalid)
+        return digits @ (10 ** np.arange(end - start - 1, -1, -1, dtype=np.int32))
+
+    def _column(self, name, compute):
+        """
+        :param name: str
+            название столбца
+        :param compute: Callable[[], ndarray]
+            вычисление столбца (выполняется только при первом обращении)
+        :return: ndarray
+            значения столбца
+        """
+        if name not in self._columns:
+            self._columns[name] = compute()
+        return self._columns[name]
+
+    @property
+    def year(self):
+        """
+        :return: ndarray[int32]
+            год публикации (проверяется формат ГГГГ-ММ-ДД)
+        """
+        return self._column("year", self._year)
+
+    def _year(self):
+        """
+        :return: ndarray[int32]
+            год публикации после проверки разделителей даты
+        """
+        self._expect({4: "-", 7: "-"})
+        return self._number(0, 4)
+
+    @property
+    def month(self):
+        """
+        :return: ndarray[int32]
+            год и месяц публикации в виде числа ГГГГММ
+        """
+        return self._column("month", lambda: self.year * 100 + self._number(5, 7))
+
+    @property
+    def date(self):
+        """
+        :return: ndarray[int32]
+            дата публикации в виде числа ГГГГММДД
+        """
+        return self._column("date", lambda: self.month * 100 + self._number(8, 10))
+
+    @property
+    def epoch(self):
+        """
+        :return: ndarray[int64]
+            секунды с 01.01.1970 UTC (проверяется формат всей строки ГГГГ-ММ-ДДTчч:мм:сс+ЧЧММ)
+        """
+        return self._column("epoch", self._epoch)
+
+    def _epoch(self):
+        """
+        :return: ndarray[int64]
+            секунды с 01.01.1970 UTC (дни считаются по пролептическому григорианскому календарю)
+        """
+        self._expect({10: "T", 13: ":", 16: ":"})
+        year = self.year.astype(np.int64)
+        month = (self.month % 100).astype(np.int64)
+        day = (self.date % 100).astype(np.int64)
+        # год считается с марта, чтобы 29 февраля было последним днём года
+        year -= month <= 2
+        era = year // 400
+        year_of_era = year - era * 400
+        day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        days = era * 146097 + day_of_era - 719468
+
+        sign = self._chars[:, 19]
+        if ((sign != ord("+")) & (sign != ord("-"))).any():
+            raise ValueError("Неверный часовой пояс даты публикации")
+        offset = self._number(20, 22).astype(np.int64) * 3600 + self._number(22, 24) * 60
+        return days * 86400 + self._number(11, 13).astype(np.int64) * 3600 + self._number(14, 16) * 60 \
+            + self._number(17, 19) - np.where(sign == ord("+"), offset, -offset)
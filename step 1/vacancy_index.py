@@ -0,0 +1,195 @@
+import re
+
+import numpy as np
+
+import csv_cache
+from currency_rates import CurrencyRates
+from timestamps import Timestamps
+from vacancy_query import DateRange, Equals, column_values
+
+# Столбцы с хэш индексами (значение -> номера строк)
+HASH_COLUMNS = ('area_name', 'employer_name', 'experience_id', 'salary_currency')
+# Сортированные индексы: средний оклад в рублях и дата публикации
+SORTED_COLUMNS = ('salary', 'published_at')
+DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+class VacancyIndex:
+    """
+    Вторичные индексы таблицы вакансий, хранящиеся на диске рядом с кэшем столбцов (csv_cache)
+
+    Номера строк - номера строк кэша 'table' (очищенных вакансий без пропусков).
+    Хэш индекс столбца: номера строк, упорядоченные по значению, и границы групп одинаковых значений.
+    Сортированный индекс: порядок строк по ключу, ключи в этом порядке и ранг каждой строки
+    (у одинаковых ключей одинаковый ранг). Индексы строятся при первом обращении и перестраиваются,
+    когда меняется исходный файл или курсы валют.
+
+    Atributes
+    ---------
+    arrays : dict[str, ndarray | (ndarray, str[])]
+        массивы индексов
+
+    >>> from vacancy_query import Query
+    >>> index = VacancyIndex(VacancyIndex.build({
+    ...     'area_name': ['Москва', 'Пермь', 'Москва'], 'employer_name': ['А', 'Б', 'В'],
+    ...     'experience_id': ['noExperience'] * 3, 'salary_currency': ['RUR', 'RUR', 'RUR'],
+    ...     'salary_from': ['10000.0', '30000.0', '10000.0'], 'salary_to': ['20000.0', '40000.0', '20000.0'],
+    ...     'published_at': ['2022-07-05T10:00:00+0300', '2021-01-01T00:00:00+0300', '2022-07-05T09:00:00+0300']}))
+    >>> index.rows_for(Query.parse('area_name: Москва И published_at: 01.07.2022 - 31.07.2022')).tolist()
+    [0, 2]
+    >>> index.rows_for(Query.parse('area_name: Пермь ИЛИ experience_id: moreThan6')).tolist()
+    [1]
+    >>> print(index.rows_for(Query.parse('name: Аналитик ИЛИ area_name: Пермь')))
+    None
+    >>> index.range_rows('salary', 15000, 25000).tolist(), index.rank('salary').tolist()
+    ([0, 2], [0, 1, 0])
+    """
+
+    def __init__(self, arrays):
+        """
+        Инициализация обьекта
+        :param arrays: dict[str, ndarray | (ndarray, str[])]
+            массивы индексов (VacancyIndex.build или csv_cache.load с decode=False)
+        """
+        self.arrays = arrays
+        self._codes = {}
+
+    @classmethod
+    def open(cls, file_name, columns):
+        """
+        Открывает индексы файла, при их отсутствии или устаревании - строит и сохраняет
+        :param file_name: str
+            имя/полный путь исходного csv файла
+        :param columns: dict[str, (ndarray, str[]) | Sequence[str]]
+            очищенные столбцы кэша 'table' (нужны только при построении)
+        :return: VacancyIndex
+        """
+        tag = 'table-index-' + CurrencyRates.get_default().fingerprint
+        arrays = csv_cache.load(file_name, tag, decode=False)
+        if arrays is None:
+            arrays = cls.build(columns)
+            csv_cache.save(file_name, tag, arrays)
+        return cls(arrays)
+
+    @staticmethod
+    def build(columns):
+        """
+        Строит индексы по столбцам таблицы
+        :param columns: dict[str, (ndarray, str[]) | Sequence[str]]
+            очищенные столбцы
+        :return: dict[str, ndarray | (ndarray, str[])]
+            массивы индексов для сохранения в кэш (csv_cache.save)
+        :raises KeyError: курс валюты одной из вакансий неизвестен
+        """
+        arrays = {}
+        for name in HASH_COLUMNS:
+            vocab, codes = np.unique(column_values(columns[name]).astype(str), return_inverse=True)
+            codes = codes.reshape(-1)
+            arrays[name] = (codes.astype(np.int32), vocab.tolist())
+            arrays[name + '.order'] = np.argsort(codes, kind='stable').astype(np.int32)
+            arrays[name + '.offsets'] = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(vocab)))))
+
+        dates = column_values(columns['published_at']).astype(str)
+        currencies = column_values(columns['salary_currency']).astype(str)
+        rates = CurrencyRates.get_default().get_rates(currencies, dates)
+        unknown = np.flatnonzero(np.isnan(rates))
+        if len(unknown):
+            # как и Salary (get_rate), неизвестный курс - ошибка, а не NaN в окладах
+            raise KeyError(f"Нет курса {currencies[unknown[0]]} на {dates[unknown[0]][:7]}")
+        # как в Salary: каждая граница переводится в рубли отдельно
+        salary = (column_values(columns['salary_from']).astype(float) * rates +
+                  column_values(columns['salary_to']).astype(float) * rates) / 2
+        VacancyIndex._add_sorted(arrays, 'salary', salary, salary)
+        days = Timestamps(dates).date
+        VacancyIndex._add_sorted(arrays, 'published_at', dates, days)
+        return arrays
+
+    @staticmethod
+    def _add_sorted(arrays, name, keys, values):
+        """
+        Добавляет сортированный индекс
+        :param arrays: dict[str, ndarray]
+            массивы индексов
+        :param name: str
+            название индекса
+        :param keys: ndarray
+            ключи сортировки строк
+        :param values: ndarray
+            числовые значения для поиска диапазонов (упорядочены так же, как ключи)
+        """
+        order = np.argsort(keys, kind='stable')
+        ordered = keys[order]
+        dense = np.concatenate(([0], np.cumsum(ordered[1:] != ordered[:-1])))[:len(order)]
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = dense
+        arrays[name + '.order'] = order.astype(np.int32)
+        arrays[name + '.keys'] = np.asarray(values)[order]
+        arrays[name + '.rank'] = rank
+
+    def rows_for(self, query):
+        """
+        Строки-кандидаты для запроса: пересечение строк индексируемых условий группы, обьединённое по группам
+        :param query: Query
+            запрос фильтрации
+        :return: ndarray | None
+            возрастающие номера строк, среди которых есть все подходящие под запрос;
+            None - в какой-то группе нет условий на индексированные столбцы
+        """
+        result = []
+        for clause in query.clauses:
+            rows = None
+            for condition in clause:
+                found = self._condition_rows(condition)
+                if found is not None:
+                    rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+            if rows is None:
+                return None
+            result.append(rows)
+        return result[0] if len(result) == 1 else np.unique(np.concatenate(result))
+
+    def _condition_rows(self, condition):
+        """
+        :param condition: Condition
+            условие запроса
+        :return: ndarray | None
+            возрастающие номера строк, удовлетворяющих условию; None - условие не отвечается по индексу
+        """
+        if isinstance(condition, Equals) and condition.columns[0] in HASH_COLUMNS:
+            name = condition.columns[0]
+            if name not in self._codes:
+                self._codes[name] = dict((value, code) for code, value in enumerate(self.arrays[name][1]))
+            code = self._codes[name].get(condition.value)
+            if code is None:
+                return np.empty(0, dtype=np.int32)
+            offsets = self.arrays[name + '.offsets']
+            return np.asarray(self.arrays[name + '.order'][offsets[code]:offsets[code + 1]])
+        if isinstance(condition, DateRange) and DATE.fullmatch(condition.first) and DATE.fullmatch(condition.last):
+            return self.range_rows('published_at', int(condition.first.replace('-', '')),
+                                   int(condition.last.replace('-', '')))
+        return None
+
+    def range_rows(self, name, low, high):
+        """
+        Строки, значение сортированного индекса которых в диапазоне включительно
+        :param name: str
+            salary (средний оклад в рублях) или published_at (дата вида ГГГГММДД)
+        :param low: float
+            нижняя граница
+        :param high: float
+            верхняя граница
+        :return: ndarray
+            возрастающие номера строк
+        """
+        keys = self.arrays[name + '.keys']
+        order = self.arrays[name + '.order']
+        return np.sort(order[np.searchsorted(keys, low, 'left'):np.searchsorted(keys, high, 'right')])
+
+    def rank(self, name):
+        """
+        :param name: str
+            salary или published_at
+        :return: ndarray
+            ранг каждой строки в порядке сортированного индекса (у равных значений ранги равны)
+        """
+        return self.arrays[name + '.rank']
+
@@ -0,0 +1,362 @@
+import re
+
+import numpy as np
+
+# Условия запроса разделяются " И " (все условия группы) и " ИЛИ " (хотя бы одна группа), И связывает сильнее
+OR_SEPARATOR = " ИЛИ "
+AND_SEPARATOR = " И "
+SALARY = "Оклад"
+# Поля, по которым можно фильтровать: разделитель делит запрос, только если за ним идёт "поле: "
+FIELDS = ("name", "description", "key_skills", "experience_id", "premium", "employer_name", "salary_from",
+          "salary_to", "salary_gross", "salary_currency", "area_name", "published_at", SALARY)
+
+
+class Condition:
+    """
+    Условие на значения нескольких столбцов
+
+    Наследники определяют метод test(*values) - проверку значений столбцов одной строки.
+
+    Atributes
+    ---------
+    columns : str[]
+        проверяемые столбцы (очищенные строковые значения)
+    cost : int
+        относительная стоимость проверки одной строки
+    """
+    columns = []
+    cost = 1
+
+    def mask(self, *arrays):
+        """
+        Проверка сразу всех строк
+        :param arrays: ndarray
+            столбцы (массивы обьектов одинаковой длины)
+        :return: ndarray[bool]
+        """
+        return np.fromiter(map(self.test, *arrays), dtype=bool, count=len(arrays[0]))
+
+
+class Equals(Condition):
+    def __init__(self, column, value):
+        self.columns = [column]
+        self.value = value
+
+    def test(self, value):
+        """
+        :param value: str
+            значение столбца
+        :return: bool
+            совпадает ли значение с искомым
+        """
+        return value == self.value
+
+    def mask(self, array):
+        return np.asarray(array == self.value, dtype=bool)
+
+
+class SkillsContain(Condition):
+    """
+    Все навыки есть в столбце навыков (навыки разделены переводом строки)
+    """
+    cost = 3
+
+    def __init__(self, column, skills):
+        self.columns = [column]
+        self.skills = set(skills)
+
+    def test(self, value):
+        """
+        :param value: str
+            навыки, разделённые переводом строки
+        :return: bool
+            есть ли среди навыков все искомые
+        """
+        return self.skills.issubset(value.split("\n"))
+
+
+class DateRange(Condition):
+    """
+    Дата публикации (первые 10 символов ГГГГ-ММ-ДД) в диапазоне включительно
+    """
+
+    def __init__(self, column, first, last):
+        self.columns = [column]
+        self.first = first
+        self.last = last
+
+    def test(self, value):
+        """
+        :param value: str
+            дата публикации вида ГГГГ-ММ-ДДTчч:мм:сс+ЧЧММ
+        :return: bool
+            попадает ли дата в диапазон
+        """
+        return self.first <= value[:10] <= self.last
+
+    def mask(self, array):
+        dates = array.astype("U10")
+        return (dates >= self.first) & (dates <= self.last)
+
+
+class SalaryRange(Condition):
+    """
+    Вилка оклада пересекается с диапазоном включительно (для одного числа - число внутри вилки)
+    """
+    cost = 2
+
+    def __init__(self, low, high):
+        self.columns = ["salary_from", "salary_to"]
+        self.low = low
+        self.high = high
+
+    def test(self, salary_from, salary_to):
+        """
+        :param salary_from: str
+            нижняя граница вилки оклада
+        :param salary_to: str
+            верхняя граница вилки оклада
+        :return: bool
+            пересекается ли вилка с диапазоном
+        """
+        return float(salary_from) <= self.high and self.low <= float(salary_to)
+
+    def mask(self, salary_from, salary_to):
+        return (salary_from.astype(float) <= self.high) & (self.low <= salary_to.astype(float))
+
+
+def column_values(column, rows=None):
+    """
+    Значения столбца
+    :param column: (ndarray, str[]) | Sequence[str]
+        словарное кодирование столбца (коды и словарь, csv_cache.load с decode=False; код -1 - пропуск)
+        или очищенные значения
+    :param rows: ndarray | None
+        номера нужных строк (None - все строки)
+    :return: ndarray
+        значения строк (массив обьектов); декодируются только нужные строки
+
+    >>> column_values((np.array([1, 0, 1]), ['Москва', 'Пермь']), np.array([0, 2])).tolist()
+    ['Пермь', 'Пермь']
+    """
+    if isinstance(column, tuple):
+        codes, vocab = column
+        if rows is not None and len(rows) < len(vocab):
+            values = np.empty(len(rows), dtype=object)
+            values[:] = [vocab[code] if code >= 0 else None for code in codes[rows].tolist()]
+            return values
+        return np.array(vocab + [None], dtype=object)[codes if rows is None else codes[rows]]
+    values = np.asarray(column, dtype=object)
+    return values if rows is None else values[rows]
+
+
+def _check(condition, columns, rows):
+    """
+    Проверка условия на части строк
+    :param condition: Condition
+        условие
+    :param columns: dict[str, ndarray | (ndarray, str[])]
+        столбцы: значения или словарное кодирование
+    :param rows: ndarray
+        номера проверяемых строк
+    :return: ndarray[bool]
+        подходит ли каждая из строк
+    """
+    arrays = [columns[name] for name in condition.columns]
+    if len(arrays) == 1 and isinstance(arrays[0], tuple) and len(arrays[0][1]) < len(rows):
+        # условие на закодированный столбец проверяется один раз для каждого значения словаря
+        codes, vocab = arrays[0]
+        passed = np.append(condition.mask(np.array(vocab, dtype=object)), False)
+        return passed[codes[rows]]
+    return condition.mask(*[column_values(array, rows) for array in arrays])
+
+
+def _parse_date(text):
+    """
+    :param text: str
+        дата вида ДД.ММ.ГГГГ
+    :return: str
+        дата вида ГГГГ-ММ-ДД
+    """
+    return "-".join(reversed(text.strip().split(".")))
+
+
+def parse_condition(field, value):
+    """
+    Создаёт условие по названию столбца и значению
+    :param field: str
+        столбец (название из файла) или "Оклад"
+    :param value: str
+        значение; для оклада и даты публикации можно указать диапазон "от - до"
+    :return: Condition
+    """
+    if field == SALARY:
+        bounds = [float(bound) for bound in re.split(r"\s*-\s*", value.strip(), maxsplit=1)]
+        return SalaryRange(bounds[0], bounds[-1])
+    if field == "key_skills":
+        return SkillsContain(field, value.split(", "))
+    if field == "published_at":
+        dates = [_parse_date(date) for date in value.split(" - ", 1)]
+        return DateRange(field, dates[0], dates[-1])
+    return Equals(field, value)
+
+
+class Query:
+    """
+    Запрос из условий, обьединённых И/ИЛИ
+
+    Запрос разбирается один раз. Внутри группы условия проверяются от самых дешёвых, при проверке столбцов
+    (mask) порядок уточняется по доле строк, отбрасываемых условием на выборке.
+
+    Atributes
+    ---------
+    clauses : Condition[][]
+        группы условий: строка подходит, если подходит хотя бы одна группа (все её условия)
+
+    >>> query = Query.parse("area_name: Москва И Оклад: 50000 - 100000 ИЛИ key_skills: Git, SQL")
+    >>> query.columns
+    ['area_name', 'salary_from', 'salary_to', 'key_skills']
+    >>> query.match({"area_name": "Москва", "salary_from": "90000", "salary_to": "120000", "key_skills": "Python"})
+    True
+    >>> query.match({"area_name": "Пермь", "salary_from": "90000", "salary_to": "120000", "key_skills": "SQL\\nGit"})
+    True
+    >>> query.match({"area_name": "Пермь", "salary_from": "90000", "salary_to": "120000", "key_skills": "SQL"})
+    False
+    >>> query.mask({"area_name": ["Москва", "Москва", "Пермь"], "salary_from": ["10000", "60000", "1"],
+    ...             "salary_to": ["20000", "70000", "2"], "key_skills": ["Git", "Git", "Git\\nSQL"]}).tolist()
+    [False, True, True]
+    >>> Query.parse("published_at: 01.01.2010 - 31.12.2011").match({"published_at": "2011-05-03T10:00:00+0300"})
+    True
+    >>> query.mask({"area_name": (np.array([0, 0, 1, 1]), ["Москва", "Пермь"]), "salary_from": ["1"] * 4,
+    ...             "salary_to": ["60000"] * 4, "key_skills": ["Git", "Git", "SQL", "Git\\nSQL"]}).tolist()
+    [True, True, False, True]
+    """
+
+    def __init__(self, clauses):
+        """
+        Инициализация обьекта
+        :param clauses: Condition[][]
+            группы условий
+        """
+        self.clauses = [sorted(clause, key=lambda condition: condition.cost) for clause in clauses]
+
+    @classmethod
+    def parse(cls, text, translate=None):
+        """
+        Разбирает запрос вида "поле: значение И поле: значение ИЛИ поле: значение"
+        :param text: str
+            текст запроса
+        :param translate: Callable[[str], str] | None
+            перевод названий полей и значений в названия и значения столбцов
+        :return: Query
+        """
+        translate = translate or (lambda word: word)
+        clauses = []
+        for clause in split_conditions(text, lambda field: translate(field) in FIELDS):
+            conditions = []
+            for condition in clause:
+                field, value = (translate(word) for word in condition.split(": ", 1))
+                conditions.append(parse_condition(field, value))
+            clauses.append(conditions)
+        return cls(clauses)
+
+    @property
+    def columns(self):
+        """
+        :return: str[]
+            все столбцы, нужные для проверки запроса
+        """
+        columns = []
+        for clause in self.clauses:
+            for condition in clause:
+                columns.extend(column for column in condition.columns if column not in columns)
+        return columns
+
+    def match(self, values):
+        """
+        :param values: dict[str, str]
+            столбец - очищенное значение строки (нужны только столбцы columns)
+        :return: bool
+            подходит ли строка под запрос
+        """
+        return any(all(condition.test(*[values[column] for column in condition.columns]) for condition in clause)
+                   for clause in self.clauses)
+
+    def mask(self, columns, sample=1000):
+        """
+        Проверка всех строк столбцов
+
+        Каждое следующее условие группы проверяется только на строках, прошедших предыдущие, а каждая следующая
+        группа - только на строках, ещё не подошедших под запрос.
+        :param columns: dict[str, Sequence[str] | (ndarray, str[])]
+            столбец - очищенные значения или словарное кодирование (коды и словарь, csv_cache.load с decode=False);
+            условие на один закодированный столбец проверяется на значениях словаря, а не на каждой строке
+        :param sample: int
+            размер выборки для оценки доли отбрасываемых строк
+        :return: ndarray[bool]
+            подходит ли каждая строка под запрос
+        """
+        arrays = dict((name, columns[name] if isinstance(columns[name], tuple)
+                       else np.asarray(columns[name], dtype=object)) for name in self.columns)
+        first = next(iter(arrays.values()), ())
+        rows = len(first[0] if isinstance(first, tuple) else first)
+        result = np.zeros(rows, dtype=bool)
+        for clause in self._ordered(arrays, min(sample, rows)):
+            left = np.flatnonzero(~result)
+            for condition in clause:
+                if not len(left):
+                    break
+                left = left[_check(condition, arrays, left)]
+            result[left] = True
+        return result
+
+    def _ordered(self, arrays, sample):
+        """
+        :return: Condition[][]
+            группы, упорядоченные по убыванию доли подходящих строк, с условиями, упорядоченными
+            по доле отбрасываемых строк на единицу стоимости
+        """
+        head = np.arange(sample)
+
+        def passed(condition):
+            if not sample:
+                return 1.0
+            return float(_check(condition, arrays, head).mean())
+
+        rates = [[(passed(condition), condition) for condition in clause] for clause in self.clauses]
+        clauses = []
+        for clause in sorted(rates, key=lambda clause: -np.prod([rate for rate, _ in clause])):
+            clause = sorted(clause, key=lambda item: -(1 - item[0]) / item[1].cost)
+            clauses.append([condition for _, condition in clause])
+        return clauses
+
+
+def split_conditions(text, is_field=None):
+    """
+    Делит запрос на условия. Разделитель " И "/" ИЛИ " делит запрос, только если после него идёт
+    известное поле и ": ", иначе он считается частью значения предыдущего условия
+    :param text: str
+        текст запроса
+    :param is_field: Callable[[str], bool] | None
+        является ли слово названием поля (None - одно из FIELDS)
+    :return: str[][]
+        группы условий "поле: значение"
+
+    >>> split_conditions("Название: Аналитик И Оклад: 1000 ИЛИ Премиум-вакансия: Да",
+    ...                  lambda field: field in ("Название", "Оклад", "Премиум-вакансия"))
+    [['Название: Аналитик', 'Оклад: 1000'], ['Премиум-вакансия: Да']]
+    >>> split_conditions("employer_name: ООО Рога И Копыта ИЛИ Сбер И area_name: Москва")
+    [['employer_name: ООО Рога И Копыта ИЛИ Сбер', 'area_name: Москва']]
+    """
+    is_field = is_field or (lambda field: field in FIELDS)
+    parts = re.split(f"({OR_SEPARATOR}|{AND_SEPARATOR})", text)
+    clauses = [[parts[0]]]
+    for separator, part in zip(parts[1::2], parts[2::2]):
+        if ": " in part and is_field(part.split(": ", 1)[0]):
+            if separator == OR_SEPARATOR:
+                clauses.append([part])
+            else:
+                clauses[-1].append(part)
+        else:
+            clauses[-1][-1] += separator + part
+    return clauses
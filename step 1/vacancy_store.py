@@ -0,0 +1,194 @@
+from array import array
+from collections.abc import Sequence
+
+
+class VacancyStore:
+    """
+    Колоночное хранилище вакансий для статистики
+
+    Вместо обьекта на каждую вакансию хранит несколько плотных массивов одинаковой длины.
+    Названия вакансий и регионов кодируются целыми числами через словари (код - индекс в списке),
+    коды выдаются в порядке первого появления значения.
+
+    Atributes
+    ---------
+    names : str[]
+        словарь названий вакансий: код -> название
+    areas : str[]
+        словарь регионов: код -> регион
+    name_codes : array[int]
+        коды названий вакансий
+    area_codes : array[int]
+        коды регионов
+    dates : array[int]
+        даты публикации в виде числа ГГГГММДД
+    salaries : array[float]
+        средний оклад в рублях
+
+    >>> store = VacancyStore()
+    >>> store.append("Программист", 50000.0, "Москва", 20071015)
+    >>> store.append("Аналитик", 40000.0, "Пермь", 20110102)
+    >>> store.append("Программист", 70000.0, "Москва", 20110305)
+    >>> len(store), store.names, store.areas
+    (3, ['Программист', 'Аналитик'], ['Москва', 'Пермь'])
+    >>> list(store.name_codes), list(store.years())
+    ([0, 1, 0], [2007, 2011, 2011])
+    >>> store.row(1)
+    ('Аналитик', 40000.0, 'Пермь', 20110102)
+    """
+
+    def __init__(self):
+        """
+        Инициализация обьекта, создание пустых колонок
+        """
+        self.names = []
+        self.areas = []
+        self._name_index = {}
+        self._area_index = {}
+        self.name_codes = array('i')
+        self.area_codes = array('i')
+        self.dates = array('i')
+        self.salaries = array('d')
+
+    def __len__(self):
+        return len(self.salaries)
+
+    @staticmethod
+    def _encode(value, values, index):
+        """
+        Возвращает код значения, при необходимости добавляя его в словарь
+        :param value: str
+            значение
+        :param values: str[]
+            словарь код -> значение
+        :param index: dict[str, int]
+            словарь значение -> код
+        :return: int
+            код значения
+        """
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, name, average_salary, area_name, date):
+        """
+        Добавляет вакансию в хранилище
+        :param name: str
+            название вакансии
+        :param average_salary: float
+            средний оклад в рублях
+        :param area_name: str
+            название региона
+        :param date: int
+            дата публикации в виде числа ГГГГММДД
+        """
+        self.name_codes.append(VacancyStore._encode(name, self.names, self._name_index))
+        self.area_codes.append(VacancyStore._encode(area_name, self.areas, self._area_index))
+        self.dates.append(date)
+        self.salaries.append(average_salary)
+
+    def set_dates(self, dates):
+        """
+        Заменяет колонку дат (например, разобранных одним векторным проходом, см. timestamps.Timestamps)
+        :param dates: ndarray[int32]
+            даты публикации в виде числа ГГГГММДД, по одной на вакансию
+        """
+        if len(dates) != len(self):
+            raise ValueError("Количество дат не совпадает с количеством вакансий")
+        self.dates = array('i', dates.astype('int32').tobytes())
+
+    def to_columns(self):
+        """
+        :return: dict[str, array | (array, str[])]
+            колонки для сохранения в кэш (csv_cache.save)
+        """
+        return {"name": (self.name_codes, self.names),
+                "area_name": (self.area_codes, self.areas),
+                "date": self.dates,
+                "salary": self.salaries}
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Создаёт хранилище поверх колонок кэша (csv_cache.load с decode=False) без копирования массивов.
+        Такое хранилище доступно только для чтения.
+        :param columns: dict[str, ndarray | (ndarray, str[])]
+            колонки кэша
+        :return: VacancyStore
+        """
+        store = cls()
+        store.name_codes, store.names = VacancyStore._view(columns["name"][0], "i"), columns["name"][1]
+        store.area_codes, store.areas = VacancyStore._view(columns["area_name"][0], "i"), columns["area_name"][1]
+        store.dates = VacancyStore._view(columns["date"], "i")
+        store.salaries = VacancyStore._view(columns["salary"], "d")
+        return store
+
+    @staticmethod
+    def _view(values, typecode):
+        """
+        :param values: ndarray
+            массив кэша
+        :param typecode: str
+            тип элементов ('i' или 'd')
+        :return: memoryview
+            представление массива, элементы которого читаются как обычные int/float
+        """
+        return memoryview(values).cast("B").cast(typecode) if len(values) else array(typecode)
+
+    def years(self):
+        """
+        :return: Iterator[int]
+            годы публикации вакансий
+        """
+        return (date // 10000 for date in self.dates)
+
+    def row(self, index):
+        """
+        Собирает одну вакансию из колонок
+        :param index: int
+            номер вакансии
+        :return: (str, float, str, int)
+            название, средний оклад, регион, дата публикации (ГГГГММДД)
+        """
+        return (self.names[self.name_codes[index]], self.salaries[index],
+                self.areas[self.area_codes[index]], self.dates[index])
+
+
+class VacancyView(Sequence):
+    """
+    Ленивое представление хранилища в виде списка вакансий
+
+    Обьект вакансии создаётся только при обращении к элементу и нигде не сохраняется.
+
+    Atributes
+    ---------
+    store : VacancyStore
+        хранилище вакансий
+    factory : Callable[[str, float, str, int], Any]
+        функция, создающая вакансию из строки хранилища
+    """
+
+    def __init__(self, store, factory):
+        """
+        Инициализация обьекта
+        :param store: VacancyStore
+            хранилище вакансий
+        :param factory: Callable[[str, float, str, int], Any]
+            функция, создающая вакансию из строки хранилища
+        """
+        self.store = store
+        self.factory = factory
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("vacancy index out of range")
+        return self.factory(*self.store.row(index))
@@ -0,0 +1,172 @@
+import concurrent.futures as con_fut
+import os
+
+import pandas as pd
+
+from partition_manifest import PartitionStats, write_manifest
+
+# Столбцы окладов всегда читаются как float, чтобы все куски записывались одинаково (иначе кусок без пропусков
+# получил бы int64 и записал бы "12000", а кусок с пропусками - "12000.0")
+FLOAT_COLUMNS = ("salary", "salary_from", "salary_to")
+
+
+class _PartitionWriter:
+    """
+    Буферизованная запись одного файла года
+
+    Atributes
+    ---------
+    path : str
+        путь к файлу года
+    fmt : str
+        формат файла: csv или parquet
+    buffer : DataFrame[]
+        ещё не записанные строки
+    rows : int
+        количество строк в буфере
+    """
+
+    def __init__(self, path, fmt):
+        """
+        Инициализация обьекта
+        :param path: str
+            путь к файлу года
+        :param fmt: str
+            формат файла: csv или parquet
+        """
+        self.path = path
+        self.fmt = fmt
+        self.buffer = []
+        self.rows = 0
+        self._file = None
+
+    def add(self, df):
+        """
+        Добавляет строки в буфер
+        :param df: DataFrame
+        """
+        self.buffer.append(df)
+        self.rows += len(df)
+
+    def flush(self):
+        """
+        Дописывает буфер в файл (при первой записи файл создаётся заново)
+        """
+        if not self.buffer:
+            return
+        df = pd.concat(self.buffer) if len(self.buffer) > 1 else self.buffer[0]
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._file is None:
+                self._file = pq.ParquetWriter(self.path, table.schema)
+            self._file.write_table(table)
+        else:
+            header = self._file is None
+            if header:
+                self._file = open(self.path, "w", encoding="utf_8", newline="")
+            df.to_csv(self._file, header=header, index=False)
+        self.buffer = []
+        self.rows = 0
+
+    def close(self):
+        """
+        Записывает остаток буфера и закрывает файл
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+
+
+def read_partition(path, usecols=None):
+    """
+    Читает файл партиции (формат - по расширению: csv или parquet)
+    :param path: str
+        путь к файлу партиции
+    :param usecols: str[] | None
+        читаемые столбцы (None - все)
+    :return: DataFrame
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=usecols)
+    return pd.read_csv(path, usecols=usecols)
+
+
+def partition_by_year(file_path, out_dir, columns, dropna=False, chunksize=100000, buffer_rows=200000, fmt="csv",
+                      workers=None):
+    """
+    Потоково разделяет файл с вакансиями на файлы по годам публикации (out_dir/part_ГГГГ.csv)
+
+    Файл читается кусками по chunksize строк, строки каждого куска раскладываются по буферам годов.
+    Когда во всех буферах набирается buffer_rows строк, буферы дописываются в свои файлы, поэтому память
+    ограничена размером куска и буферов, а не размером файла. Порядок строк внутри года сохраняется.
+    Столбцы окладов записываются как float ("12000.0"). Если в столбце оклада всего файла есть пропуски или дробные
+    значения (как в выгрузках hh.ru), содержимое csv совпадает с записью через groupby всего файла; столбец только
+    из целых чисел без пропусков раньше записывался как "12000", теперь - "12000.0" (значения те же).
+    В parquet остальные столбцы записываются строками, чтобы схема не зависела от куска.
+    Файлы партиций любого формата читаются через read_partition.
+    Рядом с партициями записывается манифест (partition_manifest) со статистикой каждой партиции.
+    :param file_path: str
+        файл/путь к файлу с данными
+    :param out_dir: str
+        папка для файлов по годам
+    :param columns: str[]
+        записываемые столбцы
+    :param dropna: bool
+        отбросить строки с пропусками
+    :param chunksize: int
+        размер куска чтения
+    :param buffer_rows: int
+        общий размер буферов, после которого они записываются
+    :param fmt: str
+        формат файлов: csv или parquet (нужен pyarrow)
+    :param workers: int | None
+        количество потоков для параллельной записи файлов разных годов (None - запись в текущем потоке)
+    :return: dict[str, int]
+        год - количество записанных строк
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    header = pd.read_csv(file_path, nrows=0).columns
+    dtype = dict((column, float if column in FLOAT_COLUMNS else str) for column in header
+                 if column in FLOAT_COLUMNS or fmt == "parquet")
+
+    writers = {}
+    counts = {}
+    stats = {}
+    salary_columns = [column for column in FLOAT_COLUMNS if column in columns]
+    executor = con_fut.ThreadPoolExecutor(max_workers=workers) if workers else None
+
+    def flush_all():
+        if executor is None:
+            for writer in writers.values():
+                writer.flush()
+        else:
+            list(executor.map(_PartitionWriter.flush, writers.values()))
+
+    try:
+        buffered = 0
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=dtype):
+            if dropna:
+                chunk = chunk.dropna()
+            for year, data in chunk.groupby(chunk["published_at"].str[:4], sort=False):
+                if year not in writers:
+                    writers[year] = _PartitionWriter(os.path.join(out_dir, f"part_{year}.{fmt}"), fmt)
+                    counts[year] = 0
+                    stats[writers[year].path] = PartitionStats()
+                writers[year].add(data[columns])
+                stats[writers[year].path].add(data, salary_columns)
+                counts[year] += len(data)
+                buffered += len(data)
+            if buffered >= buffer_rows:
+                flush_all()
+                buffered = 0
+        flush_all()
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if executor is not None:
+            executor.shutdown()
+    write_manifest(out_dir, stats)
+    return counts